@@ -0,0 +1,167 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: AsyncMemory
+   :synopsis: An asyncio front end which cleans symbols in micro-batches.
+
+An :class:`AsyncCleanUpMemory` lets many coroutines clean symbols at once
+without blocking the event loop::
+
+    memory = AsyncCleanUpMemory( CleanUpMemory( factory ), max_wait_us = 200 )
+    symbol = await memory.cleanest( noisy )
+
+Requests made while a batch is being gathered are cleaned together by a
+single call to :meth:`.CleanUpMemory.clean_batch` on an executor, so that
+the cost of each matrix product is shared between them.  A batch is sent
+once it holds `max_batch_size` requests, or `max_wait_us` microseconds
+after its first request arrived.
+"""
+import asyncio
+import collections
+import time
+
+from numpy import array, percentile
+
+class AsyncCleanUpMemory( object ):
+    """Wraps a :class:`.CleanUpMemory` (or :class:`.ShardedCleanUpMemory`)
+    to gather concurrent requests into batches.
+
+    Batches are cleaned on the executor while the event loop carries on.  If
+    a batch fails its requests are retried one at a time, so that only
+    those at fault, e.g. with symbols of another factory, fail.
+
+    :param memory: The memory to clean symbols with.
+    :param max_batch_size: The most requests cleaned in a single batch.
+    :type max_batch_size: int
+    :param max_wait_us: The longest time, in microseconds, that a request
+        waits for others to join its batch.
+    :type max_wait_us: float
+    :param executor: The :class:`concurrent.futures.Executor` to clean
+        batches on, by default that of the event loop.
+    :param history: The number of recent requests and batches kept for
+        :meth:`stats`.
+    :type history: int
+    """
+
+    def __init__( self, memory, max_batch_size = 64, max_wait_us = 200.,
+                  executor = None, history = 10000 ):
+        self.memory = memory
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self.executor = executor
+
+        # The requests waiting to be batched, as ( symbol, k, future, time )
+        # and the timer which will send them.
+        self._pending = []
+        self._timer = None
+
+        # Batches being cleaned, referenced so they are not collected
+        self._tasks = set()
+
+        # Recent request latencies (s) and batch sizes
+        self._latencies = collections.deque( maxlen = history )
+        self._batch_sizes = collections.deque( maxlen = history )
+        self._requests = 0
+        self._batches = 0
+
+    def __len__( self ):
+        return len( self.memory )
+
+    async def clean( self, symbol, k = None ):
+        """Return a list of symbols along with their similarity to the
+        given symbol, most similar first, see :meth:`.CleanUpMemory.clean`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append( ( symbol, k, future, time.perf_counter() ) )
+
+        if len( self._pending ) >= self.max_batch_size:
+            self._send()
+        elif self._timer is None:
+            self._timer = loop.call_later( self.max_wait_us * 1e-6,
+                                           self._send )
+
+        return await future
+
+    async def cleanest( self, symbol ):
+        """Return the cleanest version of symbol in the memory."""
+        return ( await self.clean( symbol, 1 ) )[0][1]
+
+    def _send( self ):
+        """Send the pending requests to be cleaned as a batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending:
+            # Leave anything left over for the next batch
+            self._timer = asyncio.get_running_loop().call_soon( self._send )
+
+        batch = [ r for r in batch if not r[2].cancelled() ]
+        if batch:
+            task = asyncio.ensure_future( self._clean( batch ) )
+            self._tasks.add( task )
+            task.add_done_callback( self._tasks.discard )
+
+    async def _clean( self, batch ):
+        """Clean a batch of requests and resolve their futures."""
+        # Clean the whole batch for the largest k requested, and cut the
+        # results down for each request.
+        ks = [ k for ( s, k, f, t ) in batch ]
+        k = None if None in ks else int( array( ks ).max() )
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor, self.memory.clean_batch,
+                [ s for ( s, k_, f, t ) in batch ], k )
+        except Exception as e:
+            if len( batch ) > 1:
+                for request in batch:
+                    await self._clean( [ request ] )
+            elif not batch[0][2].done():
+                batch[0][2].set_exception( e )
+            return
+
+        now = time.perf_counter()
+        for ( ( s, k_, future, t ), result ) in zip( batch, results ):
+            if not future.done():
+                future.set_result( result if k_ is None else result[:k_] )
+            self._latencies.append( now - t )
+
+        self._batch_sizes.append( len( batch ) )
+        self._requests += len( batch )
+        self._batches += 1
+
+    def stats( self ):
+        """Return a dictionary of statistics about recent requests.
+
+        :returns: The number of `requests` and `batches` cleaned, the
+            `mean_batch_size` and `max_batch_size` of recent batches, and the
+            50th and 99th percentile latency of recent requests in
+            milliseconds, `p50_ms` and `p99_ms`.
+        """
+        stats = { "requests" : self._requests, "batches" : self._batches,
+                  "mean_batch_size" : 0., "max_batch_size" : 0,
+                  "p50_ms" : 0., "p99_ms" : 0. }
+
+        if self._batch_sizes:
+            sizes = array( self._batch_sizes )
+            stats["mean_batch_size"] = float( sizes.mean() )
+            stats["max_batch_size"] = int( sizes.max() )
+        if self._latencies:
+            ( p50, p99 ) = percentile( array( self._latencies ), [ 50, 99 ] )
+            stats["p50_ms"] = float( 1e3 * p50 )
+            stats["p99_ms"] = float( 1e3 * p99 )
+
+        return stats
+
+    def reset_stats( self ):
+        """Forget the statistics gathered so far."""
+        self._latencies.clear()
+        self._batch_sizes.clear()
+        self._requests = 0
+        self._batches = 0
@@ -0,0 +1,127 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Cache
+   :synopsis: Least recently used cache of the results of Symbol operations.
+
+A :class:`.SymbolFactory` created with `cache_bytes` keeps the results of
+binding, unbinding, inversion and exponentiation of its Symbols in an
+:class:`OperationCache`, so that repeating an operation on the same Symbols
+returns the Symbol made the first time.
+
+Entries are keyed by the identities of the operands, and hold references to
+them so that those identities can not be reused while the entry exists.  As
+Symbols are immutable a cached result can never become stale.  The operands
+held are counted towards the size of the cache along with the results.
+The cache may be shared by several threads.
+"""
+import collections
+import threading
+
+class OperationCache( object ):
+    """A least recently used cache of Symbols, bounded by the bytes used by
+    their vectors and spectra.
+
+    :param max_bytes: The most bytes the Symbols held, the results and the
+        operands of the cached operations, may hold.  Each Symbol is counted
+        once however many entries hold it, at its size when first held.
+    :type max_bytes: int
+
+    :attr hits: The number of lookups which found a result.
+    :attr misses: The number of lookups which found nothing.
+    :attr evictions: The number of results discarded to make space.
+    """
+
+    def __init__( self, max_bytes ):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # key -> [ result, operands... ], least recently used first
+        self._entries = collections.OrderedDict()
+
+        # id -> [ Symbol, number of entries holding it, bytes ]
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def __len__( self ):
+        return len( self._entries )
+
+    def get( self, key ):
+        """Return the Symbol cached for key, or None."""
+        with self._lock:
+            entry = self._entries.get( key )
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end( key )
+            self.hits += 1
+            return entry[0]
+
+    def _size( self, s ):
+        """Return the bytes of the vector and spectrum of a Symbol."""
+        size = s._vector.nbytes
+        if s._spectrum is not None:
+            size += s._spectrum.nbytes
+        return size
+
+    def _hold( self, symbols ):
+        """Count a reference by an entry to each of the Symbols."""
+        for s in symbols:
+            held = self._held.get( id( s ) )
+            if held is None:
+                size = self._size( s )
+                self._held[id( s )] = [ s, 1, size ]
+                self.bytes += size
+            else:
+                held[1] += 1
+
+    def _release( self, symbols ):
+        """Forget a reference by an entry to each of the Symbols."""
+        for s in symbols:
+            held = self._held[id( s )]
+            held[1] -= 1
+            if held[1] == 0:
+                del self._held[id( s )]
+                self.bytes -= held[2]
+
+    def put( self, key, result, operands ):
+        """Cache the result of an operation on the operands, evicting the
+        least recently used results if required."""
+        # An operand may appear twice, but is held once by the entry
+        symbols = [ result ]
+        for s in operands:
+            if not any( s is t for t in symbols ):
+                symbols.append( s )
+        if sum( self._size( s ) for s in symbols ) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._release( self._entries.pop( key ) )
+            self._entries[key] = symbols
+            self._hold( symbols )
+
+            while self.bytes > self.max_bytes:
+                ( k, entry ) = self._entries.popitem( last = False )
+                self._release( entry )
+                self.evictions += 1
+
+    def clear( self ):
+        """Discard every cached result, the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._held.clear()
+            self.bytes = 0
+
+    def stats( self ):
+        """:returns: A dictionary of the counters and the size of the
+            cache."""
+        with self._lock:
+            return { "hits" : self.hits, "misses" : self.misses,
+                     "evictions" : self.evictions, "entries" : len( self ),
+                     "bytes" : self.bytes, "max_bytes" : self.max_bytes }
@@ -0,0 +1,261 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Encoding
+   :synopsis: Encoding of continuous values by fractional powers of Symbols.
+
+A value x is encoded as the fractional power `base^x` of a base Symbol,
+and a point ( x_1, ..., x_k ) of k dimensions as the binding of a power of
+the base of each axis.  In the frequency domain this is
+`exp( x_1 log F_1 + ... + x_k log F_k )` for the spectra F_i of the bases,
+so an (N, k) array of points is encoded by one matrix product, one
+exponential and one inverse transform::
+
+    encoder = FractionalPowerEncoder( factory, [ x_base, y_base ],
+                                      unitary = True )
+    vectors = encoder.encode( points )
+
+    decoder = FractionalPowerDecoder( encoder, grid )
+    nearest = decoder.decode( vectors )
+
+The decoder compares vectors with the encodings of a grid of candidate
+values in the frequency domain, a block of the grid at a time, without
+making the vector of any candidate.
+"""
+from numpy import ( angle, arange, argmax, asarray, complex64, conj, cos,
+                    dot, einsum, empty, exp, finfo, full, inf, log, newaxis,
+                    result_type, sin, sqrt, where )
+
+from .utils import vec_from_spectrum, vec_spectrum
+from .Label import OpLabel
+from .Symbol import Symbol
+from .Expression import _transforms_vector
+
+class FractionalPowerEncoder( object ):
+    """Encodes arrays of values as fractional powers of base Symbols.
+
+    :param factory: The :class:`.SymbolFactory` of the bases.
+    :param bases: The base Symbol, or a list of a base Symbol for each
+        axis of the values.
+    :param unitary: If True, each base is replaced by the unitary Symbol
+        with the same phases, the powers of which all have unit length and
+        are exactly inverted by their approximate inverses.  Its constant
+        and Nyquist terms are made 1, rather than -1, so that fractional
+        powers of them are real.
+    :type unitary: bool
+    :param chunk_size: The number of values encoded at once.
+    :type chunk_size: int
+    """
+
+    def __init__( self, factory, bases, unitary = False, chunk_size = 4096 ):
+        if isinstance( bases, Symbol ):
+            bases = [ bases ]
+        self.factory = factory
+        self.bases = list( bases )
+        self.unitary = unitary
+        self.chunk_size = chunk_size
+
+        # The phase and the logarithm of the magnitude of each component of
+        # the spectrum of each base, with magnitudes of zero taken as the
+        # smallest magnitude.
+        spectra = factory._spectra( self.bases )
+        self._phases = angle( spectra )
+        self._log_magnitudes = None
+        if unitary:
+            self._phases[:, 0] = 0.
+            if factory.dimensionality() % 2 == 0:
+                self._phases[:, -1] = 0.
+        else:
+            magnitudes = abs( spectra )
+            tiny = finfo( magnitudes.dtype ).tiny
+            self._log_magnitudes = log( where( magnitudes == 0., tiny,
+                                               magnitudes ) )
+
+    def axes( self ):
+        """:returns: The number of axes, k, of the values encoded."""
+        return len( self.bases )
+
+    def _exponents( self, x ):
+        """Return values as an (N, k) array."""
+        x = asarray( x, dtype = self._phases.dtype )
+        if x.ndim < 2 and self.axes() == 1:
+            x = x.reshape( -1, 1 )
+        if not ( x.ndim == 2 and x.shape[1] == self.axes() ):
+            raise ValueError( "Values must be given as an (N, %d) array." %
+                              self.axes() )
+        return x
+
+    def spectra( self, x, out = None ):
+        """Return the (N, D/2 + 1) spectra of the encodings of values.
+
+        :param x: An (N,) array of values of a single axis, or an (N, k)
+            array of points.
+        :param out: Optional complex array of the shape of the result to
+            hold it.
+        """
+        # Find the powers as magnitudes and phases, as the real functions
+        # are much faster than the exponential of complex numbers.
+        x = self._exponents( x )
+        if out is None:
+            out = empty( ( len( x ), self._phases.shape[1] ),
+                         dtype = result_type( x, complex64 ) )
+        phases = dot( x, self._phases )
+        cos( phases, out = out.real )
+        sin( phases, out = out.imag )
+        if self._log_magnitudes is not None:
+            out *= exp( dot( x, self._log_magnitudes ) )
+
+        # Only the real parts of the constant and Nyquist terms survive the
+        # inverse transform.
+        out[:, 0].imag = 0.
+        if self.factory.dimensionality() % 2 == 0:
+            out[:, -1].imag = 0.
+        return out
+
+    def encode( self, x, out = None ):
+        """Return the (N, D) array of encodings of values.
+
+        :param x: An (N,) array of values of a single axis, or an (N, k)
+            array of points.
+        :param out: Optional (N, D) array, e.g. a :class:`numpy.memmap`, to
+            write the encodings into.
+        """
+        x = self._exponents( x )
+        d = self.factory.dimensionality()
+        if out is None:
+            out = empty( ( len( x ), d ), dtype = self.factory.dtype )
+
+        # The spectra of every chunk are made in the same buffer, and are
+        # transformed directly into out where they are of the same type.
+        n = len( x )
+        buffer = empty( ( n if n < self.chunk_size else self.chunk_size,
+                          d // 2 + 1 ),
+                        dtype = result_type( self._phases, complex64 ) )
+        direct = out.dtype == buffer.real.dtype and out.flags.c_contiguous
+
+        # As for lazy expressions, Symbol types which modify their vectors
+        # are applied to the results.
+        transforms = _transforms_vector( self.factory )
+        for a in range( 0, n, self.chunk_size ):
+            b = a + self.chunk_size if a + self.chunk_size < n else n
+            f = self.spectra( x[a:b], buffer[:b - a] )
+            if transforms:
+                v = vec_from_spectrum( f, d, backend = self.factory.fft )
+                out[a:b] = self.factory._transform_rows( [ "" ] * len( v ), v )
+            elif direct:
+                vec_from_spectrum( f, d, out = out[a:b],
+                                   backend = self.factory.fft )
+            else:
+                out[a:b] = vec_from_spectrum( f, d,
+                                              backend = self.factory.fft )
+
+        return out
+
+    def symbol( self, x, label = None ):
+        """Return the Symbol encoding a single value or point.
+
+        :param label: The label of the Symbol, by default that of the
+            powers of the bases bound together.
+        """
+        x = self._exponents( [ x ] )[0]
+        if label is None:
+            for ( base, power ) in zip( self.bases, x ):
+                l = OpLabel( "exponentiate", ( base.label(), ), float( power ) )
+                label = l if label is None else OpLabel( "bind", ( label, l ) )
+
+        f = self.spectra( x[newaxis, :] )[0]
+        v = vec_from_spectrum( f, self.factory.dimensionality(),
+                               backend = self.factory.fft )
+        return self.factory._result( label, v, f )
+
+class FractionalPowerDecoder( object ):
+    """Finds the values encoded by vectors, by comparing them with the
+    encodings of a grid of candidate values.
+
+    Comparisons are made in the frequency domain, where the dot product of
+    two real vectors of dimensionality D is `sum( w * Re( F * conj( G ) ) )
+    / D` for the weights w of each term of their half spectra, a block of
+    the grid at a time.
+
+    :param encoder: The :class:`FractionalPowerEncoder` of the vectors.
+    :param grid: A (G,) array of candidate values of a single axis, or a
+        (G, k) array of candidate points.
+    :param block_size: The number of candidates compared at once.
+    :type block_size: int
+
+    :throws ValueError: The grid holds no candidates.
+    """
+
+    def __init__( self, encoder, grid, block_size = 1024 ):
+        self.encoder = encoder
+        self.grid = encoder._exponents( grid )
+        self.block_size = block_size
+        if len( self.grid ) == 0:
+            raise ValueError( "A FractionalPowerDecoder needs at least one "
+                              "candidate." )
+
+        # The weight of each term of the half spectrum, as the terms other
+        # than the constant and Nyquist terms stand for conjugate pairs.
+        d = encoder.factory.dimensionality()
+        self._weights = full( d // 2 + 1, 2. / d )
+        self._weights[0] = 1. / d
+        if d % 2 == 0:
+            self._weights[-1] = 1. / d
+
+    def _blocks( self, vectors ):
+        """Yield the first index and the (N, B) cosines of the vectors with
+        each block of the grid."""
+        d = self.encoder.factory.dimensionality()
+        vectors = asarray( vectors ).reshape( -1, d )
+        q = vec_spectrum( vectors, backend = self.encoder.factory.fft )
+        q *= self._weights
+        q_magnitudes = sqrt( einsum( "ij,ij->i", vectors, vectors ) )
+        q_magnitudes[q_magnitudes == 0.] = inf
+
+        n = len( self.grid )
+        buffer = empty( ( n if n < self.block_size else self.block_size,
+                          d // 2 + 1 ), dtype = q.dtype )
+        for a in range( 0, n, self.block_size ):
+            grid = self.grid[a:a + self.block_size]
+            f = self.encoder.spectra( grid, buffer[:len( grid )] )
+            magnitudes = sqrt( dot( f.real**2 + f.imag**2, self._weights ) )
+            magnitudes[magnitudes == 0.] = inf
+            similarities = dot( q, conj( f ).T ).real
+            similarities /= q_magnitudes[:, newaxis]
+            similarities /= magnitudes
+            yield ( a, similarities )
+
+    def similarities( self, vectors ):
+        """Return the (N, G) cosines of the angles between the vectors and
+        the encodings of each candidate."""
+        d = self.encoder.factory.dimensionality()
+        vectors = asarray( vectors ).reshape( -1, d )
+        similarities = empty( ( len( vectors ), len( self.grid ) ) )
+        for ( a, block ) in self._blocks( vectors ):
+            similarities[:, a:a + block.shape[1]] = block
+        return similarities
+
+    def decode( self, vectors, return_similarity = False ):
+        """Return the candidate most similar to each of the vectors, as an
+        (N,) array of values for a single axis, or an (N, k) array of
+        points.
+
+        :param return_similarity: If True, the (N,) array of the cosines of
+            the best candidates is also returned.
+        """
+        best = None
+        for ( a, block ) in self._blocks( vectors ):
+            top = argmax( block, axis = -1 )
+            sims = block[arange( len( block ) ), top]
+            if best is None:
+                ( best, chosen ) = ( sims, top + a )
+            else:
+                better = sims > best
+                best = where( better, sims, best )
+                chosen = where( better, top + a, chosen )
+
+        values = self.grid[chosen]
+        if self.encoder.axes() == 1:
+            values = values[:, 0]
+        return ( values, best ) if return_similarity else values
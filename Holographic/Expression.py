@@ -0,0 +1,271 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Expression
+   :synopsis: Deferred evaluation of the Symbol algebra.
+
+When a :class:`.SymbolFactory` is created with `lazy=True` the operations
+of its Symbols return :class:`LazySymbol` objects which record the
+operation rather than perform it.  The resulting expression is evaluated
+the first time its vector (or spectrum) is required, in a single pass
+which:
+
+* works in the Fourier domain throughout, so that consecutive binds,
+  unbinds, inverses and exponentiations need no transforms between them;
+* collects each sum of (scaled) terms and accumulates it into a single
+  buffer, adding terms in whichever domain they are already available;
+* evaluates each distinct subexpression once, even if it was built
+  separately more than once.
+
+A role/filler structure such as `sum( r_i (*) f_i )` therefore costs a
+forward transform for each distinct role and filler and a single inverse
+transform.  Note that Symbol types which modify their vectors, e.g.
+:class:`.SaturatingSymbol`, are only applied to the result of the
+expression and not to each intermediate step.
+"""
+from numpy import conj, roll
+
+from .utils import vec_from_spectrum, vec_spectrum
+from .Label import OpLabel
+from .Symbol import Symbol
+
+# Operations which combine into a single weighted sum
+_SUMS = ( "compose", "scale" )
+
+class LazySymbol( Symbol ):
+    """A Symbol representing an operation applied to other Symbols, which is
+    only evaluated when its vector is required.
+
+    **You will normally never need to instantiate this class.**  They are
+    returned by the operations of Symbols drawn from a lazy
+    :class:`.SymbolFactory`.
+
+    :param parent: The :class:`.SymbolFactory` from which
+        this Symbol was derived.
+    :param operation: One of "bind", "unbind", "inverse", "compose",
+        "scale" or "exponentiate".
+    :type operation: string
+    :param operands: The Symbols the operation is applied to.
+    :type operands: tuple
+    :param argument: The scale factor or power, if any.
+    """
+    __slots__ = ( "_operation", "_operands", "_argument" )
+
+    def __init__( self, parent, operation, operands, argument = None ):
+        self.parent = parent
+        self._operation = operation
+        self._operands = operands
+        self._argument = argument
+
+        # The vector and spectrum are filled in when required
+        self._label = OpLabel( operation,
+                               tuple( o._label for o in operands ), argument )
+        self._vector = None
+        self._spectrum = None
+
+    def _pending( self ):
+        """Return True if neither the vector nor spectrum are known."""
+        return self._vector is None and self._spectrum is None
+
+    def vector( self ):
+        if self._vector is None:
+            if self._spectrum is not None:
+                v = vec_from_spectrum( self._spectrum, self.dimensionality(),
+                                       backend = self.parent.fft )
+            else:
+                v = _Evaluation( self.dimensionality(),
+                                 self.parent.fft ).vector( self )
+
+            # Let the Symbol type modify the final vector, if it does so.
+            self._vector = self.parent._result( self.label(), v )._vector
+
+        return self._vector
+
+    def spectrum( self ):
+        if self._spectrum is None:
+            if self._vector is None and not _transforms_vector( self.parent ):
+                f = _Evaluation( self.dimensionality(),
+                                 self.parent.fft ).spectrum( self )
+            else:
+                f = vec_spectrum( self.vector(), backend = self.parent.fft )
+            self._spectrum = f
+
+        return self._spectrum
+
+    def dimensionality( self ):
+        return self.parent.dimensionality()
+
+def _transforms_vector( factory ):
+    """Return True if the Symbols made by the factory modify their vectors,
+    checking with a trial Symbol the first time."""
+    if factory._transforms_vector is None:
+        factory._probe()
+    return factory._transforms_vector
+
+def _accumulate( total, x, weight ):
+    """Add weight * x to the running total, returning the total."""
+    if total is None:
+        return x * weight if weight != 1 else x.copy()
+    if weight == 1:
+        total += x
+    else:
+        total += x * weight
+    return total
+
+class _Evaluation( object ):
+    """A single pass over an expression.
+
+    Each subexpression is identified by a structural key, and its value is
+    held as a pair `( t, f )` meaning `t + irfft( f )`, where either part may
+    be None.  This lets sums add together terms in whichever domain they
+    are available, and defer any transform until it is required.
+    """
+
+    def __init__( self, dimensionality, backend = None ):
+        self.dimensionality = dimensionality
+        self.backend = backend
+        self.keys = {}      # id( node ) -> key
+        self.values = {}    # key -> ( t, f )
+        self.leaves = {}    # key -> Symbol with a known value
+        self.terms = {}     # id( node ) -> [ ( term, weight ) ] for sums
+
+    def _children( self, node ):
+        """Return the nodes whose values are needed to evaluate node."""
+        if not ( isinstance( node, LazySymbol ) and node._pending() ):
+            return ()
+
+        if node._operation not in _SUMS:
+            return node._operands
+
+        # Flatten the tree of sums below this node into weighted terms
+        if id( node ) not in self.terms:
+            terms = []
+            stack = [ ( node, 1. ) ]
+            while stack:
+                ( n, w ) = stack.pop()
+                if not ( isinstance( n, LazySymbol ) and n._pending() and
+                         n._operation in _SUMS ):
+                    terms.append( ( n, w ) )
+                elif n._operation == "compose":
+                    stack.extend( ( o, w ) for o in reversed( n._operands ) )
+                else:
+                    stack.append( ( n._operands[0], w * n._argument ) )
+            self.terms[id( node )] = terms
+
+        return [ n for ( n, w ) in self.terms[id( node )] ]
+
+    def _evaluate( self, root ):
+        """Evaluate the root and everything below it, returning its key."""
+        stack = [ root ]
+        while stack:
+            node = stack[-1]
+            if id( node ) in self.keys:
+                stack.pop()
+                continue
+
+            pending = [ c for c in self._children( node )
+                        if id( c ) not in self.keys ]
+            if pending:
+                stack.extend( pending )
+                continue
+
+            stack.pop()
+            self._visit( node )
+
+        return self.keys[id( root )]
+
+    def _visit( self, node ):
+        """Evaluate a node whose children have all been evaluated."""
+        # Symbols whose value is already known
+        if not ( isinstance( node, LazySymbol ) and node._pending() ):
+            key = ( "symbol", id( node ) )
+            self.keys[id( node )] = key
+            self.leaves[key] = node
+            if node._spectrum is not None:
+                self.values[key] = ( None, node._spectrum )
+            else:
+                self.values[key] = ( node._vector, None )
+            return
+
+        operation = node._operation
+        if operation in _SUMS:
+            terms = [ ( self.keys[id( n )], w )
+                      for ( n, w ) in self.terms[id( node )] ]
+            key = ( "sum", tuple( terms ) )
+        else:
+            key = ( ( operation, node._argument ) +
+                    tuple( self.keys[id( o )] for o in node._operands ) )
+
+        self.keys[id( node )] = key
+        if key in self.values:
+            return  # A common subexpression
+
+        if operation in _SUMS:
+            ( t_, f_ ) = ( None, None )
+            for ( k, w ) in terms:
+                ( t, f ) = self.values[k]
+                if t is not None:
+                    t_ = _accumulate( t_, t, w )
+                if f is not None:
+                    f_ = _accumulate( f_, f, w )
+            self.values[key] = ( t_, f_ )
+
+        elif operation == "inverse":
+            # The inverse is a permutation of the vector, or the conjugate
+            # of the spectrum, so may be found in either domain.
+            ( t, f ) = self.values[key[2]]
+            if t is not None:
+                t = roll( t[::-1], 1 )
+            if f is not None:
+                f = conj( f )
+            self.values[key] = ( t, f )
+
+        elif operation == "bind":
+            f_ = self.spectrum_of( key[2] ) * self.spectrum_of( key[3] )
+            self.values[key] = ( None, f_ )
+
+        elif operation == "unbind":
+            f_ = self.spectrum_of( key[2] ) * conj( self.spectrum_of( key[3] ) )
+            self.values[key] = ( None, f_ )
+
+        elif operation == "exponentiate":
+            f_ = self.spectrum_of( key[2] ) ** node._argument
+
+            # Only the real parts of these terms survive the inverse
+            # transform, so discard the rest as eager evaluation would.
+            f_[0] = f_[0].real
+            if self.dimensionality % 2 == 0:
+                f_[-1] = f_[-1].real
+            self.values[key] = ( None, f_ )
+
+    def spectrum_of( self, key ):
+        """Return the spectrum of an evaluated subexpression."""
+        if key in self.leaves:
+            return self.leaves[key].spectrum()
+
+        ( t, f ) = self.values[key]
+        if t is None:
+            return f
+
+        f_ = vec_spectrum( t, backend = self.backend )
+        if f is not None:
+            f_ += f
+        self.values[key] = ( None, f_ )
+        return f_
+
+    def spectrum( self, root ):
+        """Return the spectrum of the expression."""
+        return self.spectrum_of( self._evaluate( root ) )
+
+    def vector( self, root ):
+        """Return the vector of the expression."""
+        ( t, f ) = self.values[self._evaluate( root )]
+        if f is None:
+            return t
+
+        v = vec_from_spectrum( f, self.dimensionality,
+                               backend = self.backend )
+        if t is not None:
+            v += t
+        return v
@@ -0,0 +1,261 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: FFT
+   :synopsis: Interchangeable implementations of the real Fourier transform.
+
+Every transform made by the library goes through :func:`utils.vec_spectrum`
+and :func:`utils.vec_from_spectrum`, which use a backend chosen either for
+the whole library::
+
+    FFT.set_backend( "scipy" )
+
+or for the Symbols of one factory::
+
+    factory = SymbolFactory( 512, vec_generate, Symbol,
+                             fft = FFT.ScipyFFT( workers = 4 ) )
+
+* :class:`NumpyFFT` -- :mod:`numpy.fft`, the default.
+* :class:`ScipyFFT` -- :mod:`scipy.fft`, which may split batches of
+  transforms between threads.
+* :class:`FFTWFFT` -- pyFFTW, which plans each shape of transform once and
+  keeps the plans.
+
+Each transform may write into a given array, so that loops repeating it
+need not allocate.  Backends are imported when first made, so scipy and
+pyFFTW are only needed if used.  See `benchmarks/bench_fft.py` to compare
+them on a particular machine.
+"""
+import collections
+import contextlib
+import threading
+
+import numpy
+
+class FFTBackend( object ):
+    """Provides the interface expected of all FFT backends.
+
+    Transforms are of the last axis of arrays of any shape.
+    """
+    name = None
+
+    def rfft( self, a, out = None ):
+        """Return the d/2 + 1 non-negative frequency terms of the spectrum
+        of real vectors of dimensionality d.
+
+        :param a: The vector, or array of vectors.
+        :param out: Optional complex array of the shape of the result to
+            hold it.
+        """
+        raise NotImplementedError
+
+    def irfft( self, f, d, out = None ):
+        """Return the real vectors of dimensionality d with the given
+        spectra.
+
+        :param f: The spectrum, or array of spectra.
+        :param d: The dimensionality of the vectors.
+        :param out: Optional real array of the shape of the result to hold
+            it.
+        """
+        raise NotImplementedError
+
+    def __repr__( self ):
+        return "<%s>" % type( self ).__name__
+
+def _into( result, out ):
+    """Copy a result into out, if given."""
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+class NumpyFFT( FFTBackend ):
+    """Transforms with :mod:`numpy.fft`.  Versions of numpy from 2.0 write
+    directly into `out`, earlier versions copy into it."""
+    name = "numpy"
+
+    def __init__( self ):
+        import inspect
+        self._out = "out" in inspect.signature( numpy.fft.rfft ).parameters
+
+    def rfft( self, a, out = None ):
+        if out is not None and self._out:
+            return numpy.fft.rfft( a, axis = -1, out = out )
+        return _into( numpy.fft.rfft( a, axis = -1 ), out )
+
+    def irfft( self, f, d, out = None ):
+        if out is not None and self._out:
+            return numpy.fft.irfft( f, d, axis = -1, out = out )
+        return _into( numpy.fft.irfft( f, d, axis = -1 ), out )
+
+class ScipyFFT( FFTBackend ):
+    """Transforms with :mod:`scipy.fft`.
+
+    :param workers: The number of threads batches of transforms are split
+        between, -1 for one per processor.  By default a single thread is
+        used.
+    :type workers: int
+    """
+    name = "scipy"
+
+    def __init__( self, workers = None ):
+        import scipy.fft
+        self._fft = scipy.fft
+        self.workers = workers
+
+    def rfft( self, a, out = None ):
+        return _into( self._fft.rfft( a, axis = -1, workers = self.workers ),
+                      out )
+
+    def irfft( self, f, d, out = None ):
+        return _into( self._fft.irfft( f, d, axis = -1,
+                                       workers = self.workers ), out )
+
+class FFTWFFT( FFTBackend ):
+    """Transforms with pyFFTW.
+
+    A plan is made for each dimensionality and type of transform of a
+    single vector when first performed, which may take some time with
+    thorough planning.  A batch of a shape not seen before is transformed
+    by a plan made quickly, with FFTW_ESTIMATE, and only planned thoroughly
+    if a batch of that shape is transformed again, so that batches of
+    varying size do not each wait for planning.  The most recently used
+    plans are kept.  Plans have their own buffers, which are only used by
+    one transform at a time.
+
+    :param threads: The number of threads used by each transform.
+    :type threads: int
+    :param effort: The FFTW planning flag, e.g. "FFTW_ESTIMATE" to plan
+        quickly, or "FFTW_PATIENT" for faster transforms.
+    :type effort: string
+    :param max_plans: The number of plans kept.
+    :type max_plans: int
+    """
+    name = "pyfftw"
+
+    def __init__( self, threads = 1, effort = "FFTW_MEASURE",
+                  max_plans = 64 ):
+        import pyfftw
+        self._pyfftw = pyfftw
+        self.threads = threads
+        self.effort = effort
+        self.max_plans = max_plans
+
+        # ( direction, shape, dtype, d ) -> ( plan, effort ), least
+        # recently used first
+        self._plans = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _plan( self, direction, shape, dtype, d ):
+        """Return the plan transforming arrays of the given shape and type
+        in the given direction, making it if required."""
+        key = ( direction, shape, dtype, d )
+        ( plan, effort ) = self._plans.get( key, ( None, None ) )
+        if plan is not None:
+            self._plans.move_to_end( key )
+            if effort == self.effort:
+                return plan
+
+        # Plan batches thoroughly only once their shape is seen again
+        if plan is None and len( shape ) > 1:
+            effort = "FFTW_ESTIMATE"
+        else:
+            effort = self.effort
+
+        # Create buffers for the real and complex sides of the transform
+        complex_dtype = numpy.result_type( dtype, numpy.complex64 )
+        real_dtype = numpy.empty( 0, complex_dtype ).real.dtype
+        real = self._pyfftw.empty_aligned( shape[:-1] + ( d, ), real_dtype )
+        spectrum = self._pyfftw.empty_aligned( shape[:-1] + ( d // 2 + 1, ),
+                                               complex_dtype )
+        if direction == "FFTW_FORWARD":
+            ( source, target ) = ( real, spectrum )
+        else:
+            ( source, target ) = ( spectrum, real )
+
+        plan = self._pyfftw.FFTW( source, target, axes = ( -1, ),
+                                  direction = direction,
+                                  flags = ( effort, ),
+                                  threads = self.threads )
+        self._plans[key] = ( plan, effort )
+        if len( self._plans ) > self.max_plans:
+            self._plans.popitem( last = False )
+        return plan
+
+    def _execute( self, direction, x, d, out ):
+        x = numpy.asarray( x )
+        if x.dtype.kind not in "fc":
+            x = x.astype( float )
+
+        with self._lock:
+            plan = self._plan( direction, x.shape, x.dtype, d )
+
+            # The inverse transform overwrites its input, so inputs are
+            # always copied into the buffer of the plan.
+            plan.input_array[...] = x
+            plan()
+            if out is None:
+                return plan.output_array.copy()
+            out[...] = plan.output_array
+            return out
+
+    def rfft( self, a, out = None ):
+        a = numpy.asarray( a )
+        return self._execute( "FFTW_FORWARD", a, a.shape[-1], out )
+
+    def irfft( self, f, d, out = None ):
+        return self._execute( "FFTW_BACKWARD", f, d, out )
+
+# The backends which may be chosen by name
+BACKENDS = { "numpy" : NumpyFFT, "scipy" : ScipyFFT, "pyfftw" : FFTWFFT }
+
+_default = NumpyFFT()
+
+def get_backend( backend = None ):
+    """Return a backend.
+
+    :param backend: A :class:`FFTBackend`, which is returned; or the name of
+        one, a new instance of which is returned; or None for the backend
+        used by default.
+    """
+    if backend is None:
+        return _default
+    if isinstance( backend, FFTBackend ):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError( "Unknown FFT backend %r, choose from %s." % (
+                          backend, ", ".join( sorted( BACKENDS ) ) ) )
+    return BACKENDS[backend]()
+
+def set_backend( backend ):
+    """Set the backend used by default, by name or as an
+    :class:`FFTBackend`.
+
+    :returns: The backend previously used by default.
+    """
+    global _default
+    previous = _default
+    _default = get_backend( "numpy" if backend is None else backend )
+    return previous
+
+@contextlib.contextmanager
+def using( backend ):
+    """Use a backend by default within a `with` block."""
+    previous = set_backend( backend )
+    try:
+        yield _default
+    finally:
+        set_backend( previous )
+
+def available():
+    """:returns: The names of the backends which may be used here."""
+    names = []
+    for ( name, backend ) in sorted( BACKENDS.items() ):
+        try:
+            backend()
+        except ImportError:
+            continue
+        names.append( name )
+    return names
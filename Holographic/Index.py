@@ -0,0 +1,226 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Index
+   :synopsis: Approximate nearest neighbour indices for CleanUpMemories.
+
+An index narrows the rows of a :class:`.CleanUpMemory` which need to be
+compared against a query down to a small set of candidates; the memory
+then scores the candidates exactly.  Indices are given the normalised
+vectors of symbols as they are added to the memory, and refer to them by
+the order in which they were added.
+"""
+from numpy import ( add, arange, argsort, array, bincount, ceil, dot,
+                    fromiter, log2, newaxis, random, take_along_axis,
+                    tensordot, vstack, where, zeros_like )
+
+from .utils import vec_normalise, vec_top_k
+
+class Index( object ):
+    """Provides the interface expected of all indices."""
+
+    def add( self, vectors ):
+        """Add rows to the index.
+
+        :param vectors: (N, D) array of normalised vectors, these are given
+            the ids following those of the rows already in the index.
+        """
+        raise NotImplementedError
+
+    def candidates( self, vector ):
+        """Return an array of the ids of rows which may be similar to the
+        given normalised vector."""
+        raise NotImplementedError
+
+    def empty( self ):
+        """Return a new index with the same parameters, and anything learnt
+        from the rows already added, but holding no rows.  A memory uses
+        this to rebuild its index when its rows are renumbered."""
+        raise NotImplementedError
+
+class HyperplaneIndex( Index ):
+    """Random hyperplane locality sensitive hashing.
+
+    Each table hashes a vector to the signs of its projections onto
+    `n_bits` random hyperplanes; vectors separated by a small angle are
+    likely to share a bucket.  Queries look up the bucket of the query in
+    each table, and then the `n_probes - 1` neighbouring buckets reached by
+    flipping the bits whose hyperplanes lie closest to the query.
+
+    :param n_bits: Number of hyperplanes per table.  More bits give smaller
+        buckets and so faster, but less accurate, queries.
+    :type n_bits: int
+    :param n_tables: Number of independent hash tables.
+    :type n_tables: int
+    :param n_probes: Number of buckets examined per table per query, this
+        is the main recall/latency trade-off and may be changed at any time.
+    :type n_probes: int
+    :param seed: Seed for generating the hyperplanes.
+    :type seed: int
+    """
+
+    def __init__( self, n_bits = 12, n_tables = 8, n_probes = 1, seed = None ):
+        self.n_bits = n_bits
+        self.n_tables = n_tables
+        self.n_probes = n_probes
+        self._random = random.RandomState( seed )
+
+        self._planes = None
+        self._tables = [ {} for t in range( n_tables ) ]
+        self._size = 0
+
+    def _project( self, vectors ):
+        """Return the (N, n_tables, n_bits) projections of the vectors."""
+        if self._planes is None:
+            self._planes = self._random.normal(
+                size = ( self.n_tables, self.n_bits, vectors.shape[-1] ) )
+        return tensordot( vectors, self._planes, axes = ( [-1], [-1] ) )
+
+    def _codes( self, projections ):
+        """Return the bucket codes for the given projections."""
+        return dot( projections > 0, 1 << arange( self.n_bits ) )
+
+    def add( self, vectors ):
+        codes = self._codes( self._project( vectors ) )
+
+        for ( offset, row ) in enumerate( codes ):
+            for ( table, code ) in zip( self._tables, row ):
+                table.setdefault( code, [] ).append( self._size + offset )
+
+        self._size += len( codes )
+
+    def _probes( self, projections ):
+        """Return the (n_tables, n_probes) bucket codes to look up for a
+        query with the given (n_tables, n_bits) projections."""
+        codes = self._codes( projections )
+        n_probes = self.n_probes
+        if n_probes > 2 ** self.n_bits:
+            n_probes = 2 ** self.n_bits
+        if n_probes <= 1:
+            return codes[:, newaxis]
+
+        # Only the few least confident bits are worth flipping.  Score each
+        # combination of flips of these by the total distance of the query
+        # from the hyperplanes crossed, and probe the closest buckets.
+        n_flip = int( ceil( log2( n_probes ) ) ) + 2
+        if n_flip > self.n_bits:
+            n_flip = self.n_bits
+        margins = abs( projections )
+        bits = argsort( margins, axis = -1 )[:, :n_flip]
+
+        flips = ( arange( 2 ** n_flip )[:, newaxis] >> arange( n_flip ) ) & 1
+        scores = dot( take_along_axis( margins, bits, axis = -1 ), flips.T )
+        chosen = vec_top_k( -scores, n_probes )
+
+        masks = dot( flips, ( 1 << bits ).T ).T
+        return codes[:, newaxis] ^ take_along_axis( masks, chosen, axis = -1 )
+
+    def candidates( self, vector ):
+        probes = self._probes( self._project( vector ) )
+
+        ids = set()
+        for ( table, codes ) in zip( self._tables, probes ):
+            for code in codes:
+                ids.update( table.get( code, () ) )
+
+        return fromiter( ids, dtype = int, count = len( ids ) )
+
+    def empty( self ):
+        index = HyperplaneIndex( self.n_bits, self.n_tables, self.n_probes )
+        ( index._random, index._planes ) = ( self._random, self._planes )
+        return index
+
+class IVFIndex( Index ):
+    """Inverted file index over a coarse spherical k-means clustering.
+
+    Every vector is filed under its nearest centroid, and queries examine
+    the vectors filed under the `n_probe` centroids nearest to the query.
+    Centroids are trained from the first `train_size` vectors added; until
+    then every row is returned as a candidate.
+
+    :param n_lists: Number of centroids.
+    :type n_lists: int
+    :param n_probe: Number of centroids examined per query, this is the main
+        recall/latency trade-off and may be changed at any time.
+    :type n_probe: int
+    :param train_size: Number of vectors to train the centroids with, by
+        default 32 for each centroid.
+    :type train_size: int
+    :param n_iterations: Number of k-means iterations used in training.
+    :type n_iterations: int
+    :param seed: Seed for selecting the initial centroids.
+    :type seed: int
+    """
+
+    def __init__( self, n_lists = 256, n_probe = 8, train_size = None,
+                  n_iterations = 10, seed = None ):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = 32 * n_lists if train_size is None else train_size
+        self.n_iterations = n_iterations
+        self._random = random.RandomState( seed )
+
+        self.centroids = None
+        self._lists = [ [] for l in range( n_lists ) ]
+        self._pending = []
+        self._size = 0
+
+    def _assign( self, vectors, n = 1 ):
+        """Return the indices of the n nearest centroids to each vector."""
+        return vec_top_k( dot( vectors, self.centroids.T ), n )
+
+    def _file( self, vectors, first ):
+        for ( offset, nearest ) in enumerate( self._assign( vectors )[:, 0] ):
+            self._lists[nearest].append( first + offset )
+
+    def _train( self, vectors ):
+        """Cluster the given vectors to find the centroids."""
+        chosen = self._random.choice( len( vectors ), self.n_lists, False )
+        centroids = vectors[chosen]
+
+        for i in range( self.n_iterations ):
+            self.centroids = centroids
+            nearest = self._assign( vectors )[:, 0]
+
+            # Move each centroid to the normalised mean of its vectors,
+            # leaving any which were not chosen in place.
+            sums = zeros_like( centroids )
+            add.at( sums, nearest, vectors )
+            used = bincount( nearest, minlength = self.n_lists ) > 0
+            centroids = where( used[:, newaxis], vec_normalise( sums ),
+                               centroids )
+
+        self.centroids = centroids
+
+    def add( self, vectors ):
+        if self.centroids is not None:
+            self._file( vectors, self._size )
+            self._size += len( vectors )
+            return
+
+        # Hold the vectors until there are enough to train with
+        self._pending.append( array( vectors ) )
+        self._size += len( vectors )
+
+        if self._size >= self.train_size and self._size >= self.n_lists:
+            pending = vstack( self._pending )
+            self._pending = []
+            self._train( pending )
+            self._file( pending, 0 )
+
+    def candidates( self, vector ):
+        if self.centroids is None:
+            return arange( self._size )
+
+        nearest = self._assign( vector[newaxis, :], self.n_probe )[0]
+        ids = [ self._lists[l] for l in nearest ]
+        return fromiter( ( i for l in ids for i in l ), dtype = int,
+                         count = sum( [ len( l ) for l in ids ] ) )
+
+    def empty( self ):
+        # Rows are filed under the trained centroids at once
+        index = IVFIndex( self.n_lists, self.n_probe, self.train_size,
+                          self.n_iterations )
+        ( index._random, index.centroids ) = ( self._random, self.centroids )
+        return index
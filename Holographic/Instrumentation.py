@@ -0,0 +1,246 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Instrumentation
+   :synopsis: Count the calls and time spent in the operations of the library.
+
+Instrumentation is off by default and then costs nothing: while it is on,
+the operations below are replaced by wrappers which count their calls and
+the time spent in them, and the original functions are restored when it is
+turned off again::
+
+    with instrumented() as counters:
+        run_model()
+    print( counters.snapshot()["bind"] )
+
+* `bind`, `unbind`, `inverse`, `compose`, `scale`, `exponentiate` -- the
+  operations of :class:`.Symbol`;
+* `make_symbol` -- validated construction of Symbols, and `result` --
+  construction of the results of operations;
+* `vocabulary` -- construction of a :class:`.Vocabulary`;
+* `fft` and `ifft` -- :func:`utils.vec_spectrum` and
+  :func:`utils.vec_from_spectrum`;
+* `render_label` -- conversion of labels to strings;
+* `clean`, `clean_batch`, `clean_vectors` -- the scans of a
+  :class:`.CleanUpMemory`.
+
+The bytes of the vectors of the Symbols and of the (N, D) arrays of the
+:class:`.Vocabulary` objects made are counted as `vector_bytes`.  Symbols
+which share the vectors they are made from, e.g. those of the rows of a
+Vocabulary, and Vocabularies mapped from a store add nothing.  The arrays
+a :class:`.CleanUpMemory` keeps its rows in are not counted.  Times include the time spent in any other instrumented
+operation called, e.g. `bind` includes its `fft` and `ifft`.
+"""
+import contextlib
+import threading
+import time
+
+from numpy import memmap, may_share_memory
+
+from . import ( utils, Label, Memory, Symbol, Expression, Superposition,
+                Pipeline, Encoding, Vocabulary )
+
+# The functions replaced: ( owner, attribute, counter name )
+_TARGETS = [
+    ( Symbol.Symbol, "bind", "bind" ),
+    ( Symbol.Symbol, "unbind", "unbind" ),
+    ( Symbol.Symbol, "inverse", "inverse" ),
+    ( Symbol.Symbol, "compose", "compose" ),
+    ( Symbol.Symbol, "scale", "scale" ),
+    ( Symbol.Symbol, "exponentiate", "exponentiate" ),
+    ( Symbol.SymbolFactory, "make_symbol", "make_symbol" ),
+    ( Symbol.SymbolFactory, "_result", "result" ),
+    ( Vocabulary.Vocabulary, "__init__", "vocabulary" ),
+    ( Label.Label, "render", "render_label" ),
+    ( Memory.CleanUpMemory, "clean", "clean" ),
+    ( Memory.CleanUpMemory, "clean_batch", "clean_batch" ),
+    ( Memory.CleanUpMemory, "clean_vectors", "clean_vectors" ),
+]
+
+# The modules whose transforms are replaced, as each holds its own reference
+_FFT_MODULES = [ utils, Symbol, Expression, Superposition, Pipeline,
+                 Encoding ]
+
+class Counters( object ):
+    """The counts and times gathered while instrumentation is on."""
+
+    def __init__( self ):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset( self ):
+        """Set every counter to zero."""
+        with self._lock:
+            self._calls = {}
+            self._seconds = {}
+            self.vector_bytes = 0
+
+    def add( self, name, seconds ):
+        with self._lock:
+            self._calls[name] = self._calls.get( name, 0 ) + 1
+            self._seconds[name] = self._seconds.get( name, 0. ) + seconds
+
+    def add_bytes( self, n ):
+        with self._lock:
+            self.vector_bytes += n
+
+    def snapshot( self ):
+        """:returns: A dictionary from the name of each operation called to
+            a dictionary of its `calls` and `seconds`, and `vector_bytes`."""
+        with self._lock:
+            snapshot = dict( ( name, { "calls" : self._calls[name],
+                                       "seconds" : self._seconds[name] } )
+                             for name in self._calls )
+            snapshot["vector_bytes"] = self.vector_bytes
+        return snapshot
+
+    def export( self, prefix = "holographic" ):
+        """:returns: The counters as a flat dictionary of numbers, e.g.
+            `holographic_bind_calls`, suitable for a metrics scraper."""
+        flat = {}
+        for ( name, value ) in self.snapshot().items():
+            if isinstance( value, dict ):
+                for ( field, v ) in value.items():
+                    flat["%s_%s_%s" % ( prefix, name, field )] = v
+            else:
+                flat["%s_%s" % ( prefix, name )] = value
+        return flat
+
+    def export_text( self, prefix = "holographic" ):
+        """:returns: The flat counters as lines of "name value"."""
+        return "".join( "%s %r\n" % item
+                        for item in sorted( self.export( prefix ).items() ) )
+
+#: The counters of the library
+counters = Counters()
+
+# The original functions while instrumentation is on, and the number of
+# active requests for it.
+_originals = []
+_depth = 0
+_state = threading.Lock()
+
+def _timed( name, f ):
+    """Wrap f to count its calls and time under name."""
+    def wrapper( *args, **kwargs ):
+        start = time.perf_counter()
+        try:
+            return f( *args, **kwargs )
+        finally:
+            counters.add( name, time.perf_counter() - start )
+    wrapper.__doc__ = f.__doc__
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+def _sized( f ):
+    """Wrap SymbolFactory.make_symbol to count the bytes of the vector of
+    the Symbol, unless it shares the vector it was given."""
+    def wrapper( factory, label, vector ):
+        s = f( factory, label, vector )
+        if not may_share_memory( s._vector, vector ):
+            counters.add_bytes( s._vector.nbytes )
+        return s
+    wrapper.__doc__ = f.__doc__
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+def _vocabulary_sized( f ):
+    """Wrap Vocabulary.__init__ to count the bytes of its vectors, unless
+    they are mapped from a store."""
+    def wrapper( vocabulary, factory, labels, vectors, *args, **kwargs ):
+        f( vocabulary, factory, labels, vectors, *args, **kwargs )
+        if not ( isinstance( vectors, memmap ) and
+                 may_share_memory( vocabulary.vectors, vectors ) ):
+            counters.add_bytes( vocabulary.vectors.nbytes )
+    wrapper.__doc__ = f.__doc__
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+def _result_sized( f ):
+    """Wrap SymbolFactory._result to count the bytes of the vectors of the
+    results which do not go through make_symbol."""
+    def wrapper( factory, *args, **kwargs ):
+        s = f( factory, *args, **kwargs )
+        if not ( factory.debug or factory._trusted_type is None ):
+            counters.add_bytes( s._vector.nbytes )
+        return s
+    wrapper.__doc__ = f.__doc__
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+def _install():
+    for ( owner, attribute, name ) in _TARGETS:
+        original = owner.__dict__[attribute]
+        f = _timed( name, original )
+        if attribute == "make_symbol":
+            f = _sized( f )
+        elif attribute == "_result":
+            f = _result_sized( f )
+        elif attribute == "__init__":
+            f = _vocabulary_sized( f )
+        _originals.append( ( owner, attribute, original ) )
+        setattr( owner, attribute, f )
+
+    for module in _FFT_MODULES:
+        for ( attribute, name ) in ( ( "vec_spectrum", "fft" ),
+                                     ( "vec_from_spectrum", "ifft" ) ):
+            if attribute in vars( module ):
+                original = getattr( module, attribute )
+                _originals.append( ( module, attribute, original ) )
+                setattr( module, attribute, _timed( name, original ) )
+
+def _uninstall():
+    while _originals:
+        ( owner, attribute, original ) = _originals.pop()
+        setattr( owner, attribute, original )
+
+def enable():
+    """Turn instrumentation on.  Calls nest, it stays on until
+    :func:`disable` has been called as many times."""
+    global _depth
+    with _state:
+        if _depth == 0:
+            _install()
+        _depth += 1
+
+def disable():
+    """Turn instrumentation off, restoring the original functions."""
+    global _depth
+    with _state:
+        if _depth == 0:
+            return
+        _depth -= 1
+        if _depth == 0:
+            _uninstall()
+
+def enabled():
+    """:returns: True if instrumentation is on."""
+    return _depth > 0
+
+@contextlib.contextmanager
+def instrumented( reset = False ):
+    """Turn instrumentation on within a `with` block.
+
+    :param reset: If True, the counters are reset first.
+    :returns: The :data:`counters`.
+    """
+    if reset:
+        counters.reset()
+    enable()
+    try:
+        yield counters
+    finally:
+        disable()
+
+def snapshot():
+    """:returns: :meth:`Counters.snapshot` of the :data:`counters`."""
+    return counters.snapshot()
+
+def reset():
+    """Set every counter to zero."""
+    counters.reset()
+
+def export( prefix = "holographic" ):
+    """:returns: :meth:`Counters.export` of the :data:`counters`."""
+    return counters.export( prefix )
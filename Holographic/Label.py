@@ -0,0 +1,162 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Label
+   :synopsis: Structured labels for Symbols.
+
+The label of a Symbol built by the Symbol algebra is a tree of
+:class:`OpLabel` nodes, which share their children with the labels of the
+operands, above :class:`AtomLabel` leaves.  Building a label is therefore
+O(1) however deep the structure.  The string form is only produced when
+`str()` is called, and is then kept.
+
+Labels are immutable and hashable, and compare equal when they have the
+same structure.  An :class:`AtomLabel` also compares equal to its name.
+"""
+
+# How each operation is written: literal strings interleaved with the
+# indices of the operands.
+_FORMATS = {
+    "bind" : ( "( ", 0, " (*) ", 1, " )" ),
+    "unbind" : ( "( ", 0, " (*) ", 1, "' )" ),
+    "inverse" : ( 0, "'" ),
+    "compose" : ( "( ", 0, " + ", 1, " )" ),
+    "scale" : ( "( %.3f ", 0, " )" ),
+    "exponentiate" : ( "( ", 0, "^{%.3f} )" ),
+}
+
+class Label( object ):
+    """Provides the interface expected of all labels.
+
+    :attr max_depth: If not None, the depth below which `str()` abbreviates
+        labels to "...".  Changing this does not affect labels which have
+        already been converted to strings.
+    """
+    __slots__ = ( "_hash", "_string" )
+    max_depth = None
+
+    def __str__( self ):
+        if self._string is None:
+            self._string = self.render( Label.max_depth )
+        return self._string
+
+    def __repr__( self ):
+        return "<%s %s>" % ( type( self ).__name__, self.render( 3 ) )
+
+    def __hash__( self ):
+        return self._hash
+
+    def __ne__( self, other ):
+        return not self == other
+
+    def _pieces( self ):
+        """Return the strings and child labels which make up this label."""
+        raise NotImplementedError
+
+    def render( self, max_depth = None ):
+        """Return the label as a string.
+
+        :param max_depth: If given, labels nested deeper than this are
+            written as "...".
+        :type max_depth: int
+        """
+        # Expand the tree with a stack, rather than recursion, so that very
+        # deep labels may be rendered.
+        parts = []
+        stack = [ ( self, 0 ) ]
+        while stack:
+            ( piece, depth ) = stack.pop()
+            if not isinstance( piece, Label ):
+                parts.append( piece )
+            elif max_depth is not None and depth > max_depth:
+                parts.append( "..." )
+            elif max_depth is None and piece._string is not None:
+                parts.append( piece._string )
+            else:
+                stack.extend( ( p, depth + 1 )
+                              for p in reversed( piece._pieces() ) )
+
+        return "".join( parts )
+
+class AtomLabel( Label ):
+    """The label of a Symbol which was not built from other Symbols.
+
+    :param name: The name of the Symbol, e.g., "dog".
+    """
+    __slots__ = ( "name", )
+
+    def __init__( self, name ):
+        self.name = name
+        self._hash = hash( name )
+        self._string = None
+
+    def _pieces( self ):
+        return ( "%s" % ( self.name, ), )
+
+    def __eq__( self, other ):
+        if isinstance( other, AtomLabel ):
+            return self.name == other.name
+        if isinstance( other, Label ):
+            return False
+        return self.name == other
+
+    __hash__ = Label.__hash__
+
+class OpLabel( Label ):
+    """The label of a Symbol built by an operation on other Symbols.
+
+    :param operation: The name of the operation, e.g., "bind".
+    :type operation: string
+    :param operands: The labels of the Symbols operated on.
+    :type operands: tuple of :class:`Label`
+    :param argument: The scale factor or power used, if any.
+    """
+    __slots__ = ( "operation", "operands", "argument" )
+
+    def __init__( self, operation, operands, argument = None ):
+        self.operation = operation
+        self.operands = operands
+        self.argument = argument
+        self._hash = hash( ( operation, argument, operands ) )
+        self._string = None
+
+    def _pieces( self ):
+        pieces = []
+        for p in _FORMATS[self.operation]:
+            if isinstance( p, int ):
+                pieces.append( self.operands[p] )
+            elif "%" in p:
+                pieces.append( p % self.argument )
+            else:
+                pieces.append( p )
+        return pieces
+
+    def __eq__( self, other ):
+        # Compare iteratively, skipping any shared subtrees
+        stack = [ ( self, other ) ]
+        while stack:
+            ( a, b ) = stack.pop()
+            if a is b:
+                continue
+            if not isinstance( b, Label ) or hash( a ) != hash( b ):
+                return False
+            if not isinstance( a, OpLabel ) or not isinstance( b, OpLabel ):
+                if not ( isinstance( a, AtomLabel ) and a == b ):
+                    return False
+                continue
+            if ( a.operation != b.operation or a.argument != b.argument or
+                 len( a.operands ) != len( b.operands ) ):
+                return False
+            stack.extend( zip( a.operands, b.operands ) )
+
+        return True
+
+    __hash__ = Label.__hash__
+
+def as_label( label ):
+    """Return the given label as a :class:`Label`, wrapping anything else,
+    such as a string, in an :class:`AtomLabel`."""
+    if isinstance( label, Label ):
+        return label
+    return AtomLabel( label )
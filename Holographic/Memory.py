@@ -2,44 +2,689 @@
 # -------------------------------------------------
 # (C) Copyright Andrew Mundy 2013
 
-from Symbol import *
+import threading
+
+from numpy import ( arange, array_equal, asarray, broadcast_to, dot, einsum,
+                    empty, flatnonzero, float32, full, hstack, iinfo, inf,
+                    int64, intp, newaxis, searchsorted, sqrt, vstack, where,
+                    zeros )
+
+from .utils import vec_normalise, vec_quantise, vec_top_k
+from .Symbol import Symbol
 
 def parent_match( f ):
-    def f_( self, symbol ):
+    def f_( self, symbol, *args, **kwargs ):
         if not self.factory == symbol.parent:
             raise ValueError( "You may only use Symbols with " \
                               "CleanUpMemories which share a " \
                               "SymbolFactory." )
 
-        return f( self, symbol )
+        return f( self, symbol, *args, **kwargs )
 
+    f_.__doc__ = f.__doc__
     return f_
 
+def _inverse_magnitudes( vectors ):
+    # Return the inverse magnitudes of the rows of vectors, taking those of
+    # zero vectors as zero.
+    magnitudes = sqrt( einsum( "ij,ij->i", vectors, vectors ) )
+    magnitudes[magnitudes == 0.] = inf
+    return 1. / magnitudes
+
+# Rows of codes converted to floating point at a time when scanning
+_SCAN_BLOCK = 4096
+
+# The version recorded for rows which have not been removed
+_NEVER = iinfo( int64 ).max
+
+class _Snapshot( object ):
+    """The rows of a CleanUpMemory as they were after one change.
+
+    A snapshot is not changed once it is in use.  Later snapshots may share
+    its buffers, as rows are only ever written beyond the count of earlier
+    snapshots, and a removed row is marked with the version of the first
+    snapshot in which it is removed.  Rows of vocabularies are made into
+    symbols when first required, until then their entry in symbols is None
+    and they are found in sources.
+    """
+
+    def __init__( self, count, vectors, scales, symbols, sources, index,
+                  codes = None, code_scales = None, removed = None,
+                  version = 0, dead = 0 ):
+        self.count = count
+        self.vectors = vectors
+        self.scales = scales
+        self.symbols = symbols
+        self.sources = sources      # ( first row, vocabulary, offsets )
+        self.index = index
+        self.codes = codes
+        self.code_scales = code_scales
+        self.removed = removed
+        self.version = version
+        self.dead = dead
+        self._alive = None
+
+    def replace( self, **changes ):
+        """Return a copy of this snapshot with the given changes."""
+        s = _Snapshot.__new__( _Snapshot )
+        s.__dict__.update( self.__dict__ )
+        s.__dict__.update( changes )
+        s._alive = None
+        return s
+
+    def alive( self ):
+        """Return the mask of the rows which have not been removed, or None
+        if no rows have been."""
+        if self.dead == 0:
+            return None
+        if self._alive is None:
+            self._alive = self.removed[:self.count] > self.version
+        return self._alive
+
+    def live_rows( self ):
+        """Return the array of the rows which have not been removed."""
+        alive = self.alive()
+        if alive is None:
+            return arange( self.count )
+        return flatnonzero( alive )
+
+    def _source( self, i ):
+        """Return the vocabulary holding row i, and its index there."""
+        for ( first, vocabulary, offsets ) in reversed( self.sources ):
+            if first <= i:
+                j = i - first
+                return ( vocabulary, j if offsets is None else offsets[j] )
+
+    def symbol( self, i ):
+        """Return the symbol stored in row i."""
+        if self.symbols[i] is None:
+            ( vocabulary, j ) = self._source( i )
+            self.symbols[i] = vocabulary.symbol( j )
+        return self.symbols[i]
+
+    def label( self, i ):
+        """Return the label of the symbol stored in row i."""
+        if self.symbols[i] is not None:
+            return self.symbols[i].label()
+        ( vocabulary, j ) = self._source( i )
+        return vocabulary.labels[j]
+
 class CleanUpMemory( object ):
     """A CleanUpMemory acts to clean up noisy versions of symbols.  All
-    symbols used with the memory must be drawn from the same factory."""
+    symbols used with the memory must be drawn from the same factory.
 
-    def __init__( self, factory ):
-        """Create a new CleanUpMemory with the given SymbolFactory."""
-        # Save the factory and create an empty list of symbols
+    The vectors of the stored symbols are held as the rows of a single
+    contiguous matrix, along with the factors which scale each to unit
+    length, so that comparing a symbol against the whole memory is one
+    matrix-vector product.  For very large memories an
+    :class:`.Index` may be given, in which case :meth:`clean` and
+    :meth:`cleanest` only compare against the candidates it proposes and
+    are approximate.
+
+    Alternatively the memory may keep a compact copy of the normalised
+    vectors, as float16 or int8 codes with a scale for each row, to scan in
+    place of the full precision vectors.  Scanning int8 codes reads an
+    eighth of the memory of float64 vectors.  The best `rescore` candidates
+    of the scan are then compared in full precision, so the results are
+    exact unless the true match ranks below them in the scan.
+
+    Symbols may be found by label, removed and replaced.  Removing a symbol
+    only marks its row, which queries then skip, and once the fraction of
+    rows removed exceeds `compact_threshold` the remaining rows are copied
+    into new buffers and the index rebuilt.  Each query works from the rows
+    as they were when it began, so queries may run in other threads while
+    symbols are added, removed or compacted.
+    """
+
+    def __init__( self, factory, index = None, scan_dtype = None,
+                  rescore = 64, compact_threshold = 0.25,
+                  background = False ):
+        """Create a new CleanUpMemory with the given SymbolFactory, and
+        optionally an approximate nearest neighbour :class:`.Index`.
+
+        :param scan_dtype: If given, the type of the codes to scan for
+            candidates, e.g. float16 or int8.
+        :param rescore: The number of candidates of a scan of codes to
+            compare in full precision, at least k are always compared.
+        :type rescore: int
+        :param compact_threshold: The fraction of rows which may be removed
+            before the memory is compacted, or None to only compact when
+            :meth:`compact` is called.
+        :type compact_threshold: float
+        :param background: If True, compaction is run in a new thread
+            rather than by the call which removes the row.
+        :type background: bool
+        """
         self.factory = factory
-        self.symbols = []
-    
+        self.scan_dtype = scan_dtype
+        self.rescore = rescore
+        self.compact_threshold = compact_threshold
+        self.background = background
+
+        # The rows as of the last change, the buffers of which are grown
+        # geometrically.  Changes are made one at a time, and compactions
+        # one at a time.
+        self._state = _Snapshot(
+            0, zeros( ( 0, factory.dimensionality() ), dtype = factory.dtype ),
+            zeros( 0, dtype = factory.dtype ), [], [], index )
+        self._lock = threading.RLock()
+        self._compaction = threading.Lock()
+        self._compactor = None
+
+        # Label -> rows of the stored symbols with that label, in the order
+        # they were added, made when first required
+        self._labels = None
+
+    def __len__( self ):
+        state = self._state
+        return state.count - state.dead
+
+    @property
+    def index( self ):
+        """The :class:`.Index` of the memory, if any."""
+        return self._state.index
+
+    @property
+    def symbols( self ):
+        """The list of stored symbols, in the order they were added."""
+        state = self._state
+        return [ state.symbol( i ) for i in state.live_rows() ]
+
+    @property
+    def vectors( self ):
+        """The (N, D) matrix of vectors of the stored symbols.  This is a
+        copy if symbols have been removed since the memory was compacted."""
+        state = self._state
+        alive = state.alive()
+        if alive is None:
+            return state.vectors[:state.count]
+        return state.vectors[:state.count][alive]
+
+    @property
+    def scales( self ):
+        """The factors which scale each row of :attr:`vectors` to unit
+        length."""
+        state = self._state
+        alive = state.alive()
+        if alive is None:
+            return state.scales[:state.count]
+        return state.scales[:state.count][alive]
+
+    def _symbol( self, i ):
+        """Return the symbol stored in row i."""
+        return self._state.symbol( i )
+
+    def _rows( self ):
+        """Return the dictionary from labels to the lists of rows of the
+        stored symbols, making it if required.  Call with the lock held."""
+        if self._labels is None:
+            state = self._state
+            self._labels = {}
+            for i in state.live_rows():
+                self._labels.setdefault( state.label( i ), [] ).append( i )
+        return self._labels
+
+    def __contains__( self, label ):
+        with self._lock:
+            return label in self._rows()
+
+    def __getitem__( self, label ):
+        """Return the stored symbol with the given label, the most recently
+        added if several share it.
+
+        :throws KeyError: No symbol with the label is stored.
+        """
+        with self._lock:
+            ( row, state ) = ( self._rows()[label][-1], self._state )
+        return state.symbol( row )
+
+    def _grow( self, state, n ):
+        """Return state with space for n more rows."""
+        count = state.count
+        if count + n <= state.vectors.shape[0]:
+            return state
+
+        size = 2*count or 16
+        while size < count + n:
+            size *= 2
+
+        vectors = empty( ( size, state.vectors.shape[1] ),
+                         dtype = state.vectors.dtype )
+        vectors[:count] = state.vectors[:count]
+        scales = empty( size, dtype = state.scales.dtype )
+        scales[:count] = state.scales[:count]
+
+        removed = state.removed
+        if removed is not None:
+            removed = full( size, _NEVER, dtype = int64 )
+            removed[:count] = state.removed[:count]
+
+        return state.replace( vectors = vectors, scales = scales,
+                              removed = removed )
+
+    def _added( self, state, first ):
+        """Inform the index of rows of state added from first onwards, and
+        return state with their codes."""
+        if state.index is not None:
+            state.index.add( vec_normalise( state.vectors[first:state.count] ) )
+        if self.scan_dtype is not None:
+            state = self._quantise( state, first )
+        return state
+
+    def _quantise( self, state, first ):
+        """Return state with the codes of the rows added from first
+        onwards."""
+        count = state.count
+        ( codes, scales ) = vec_quantise(
+            state.vectors[first:count] *
+            state.scales[first:count, newaxis], self.scan_dtype )
+
+        # The codes are grown geometrically, as are the vectors
+        if state.codes is None or count > state.codes.shape[0]:
+            size = state.vectors.shape[0]
+            if size < count:
+                size = count
+            ( old_codes, old_scales ) = ( state.codes, state.code_scales )
+            state = state.replace(
+                codes = empty( ( size, codes.shape[1] ), dtype = codes.dtype ),
+                code_scales = empty( size, dtype = scales.dtype ) )
+            if old_codes is not None:
+                state.codes[:first] = old_codes[:first]
+                state.code_scales[:first] = old_scales[:first]
+
+        state.codes[first:count] = codes
+        state.code_scales[first:count] = scales
+        return state
+
+    def _append( self, state, symbol ):
+        """Return state with the symbol added."""
+        state = self._grow( state, 1 )
+        n = state.count
+
+        state.vectors[n] = symbol.vector()
+        state.scales[n] = _inverse_magnitudes( state.vectors[n:n+1] )[0]
+        state.symbols.append( symbol )
+        if self._labels is not None:
+            self._labels.setdefault( symbol.label(), [] ).append( n )
+
+        return self._added( state.replace( count = n + 1 ), n )
+
     @parent_match
     def add_symbol( self, symbol ):
         """Add the given symbol to the memory."""
-        self.symbols.append( symbol )
-    
+        with self._lock:
+            self._state = self._append( self._state, symbol )
+
+    def add_vocabulary( self, vocabulary ):
+        """Add every symbol of a :class:`.Vocabulary` to the memory.
+
+        If the memory is empty it shares the array of vectors of the
+        vocabulary, rather than copying it, until more symbols are added.
+        """
+        if not self.factory == vocabulary.factory:
+            raise ValueError( "You may only use Symbols with " \
+                              "CleanUpMemories which share a " \
+                              "SymbolFactory." )
+
+        self._extend( vocabulary, _inverse_magnitudes( vocabulary.vectors ) )
+
+    def _extend( self, vocabulary, scales ):
+        """Add the rows of a vocabulary with the given inverse magnitudes."""
+        with self._lock:
+            state = self._state
+            ( n, m ) = ( state.count, len( vocabulary ) )
+            scales = asarray( scales, dtype = state.scales.dtype )
+            if n == 0:
+                state = state.replace( vectors = vocabulary.vectors,
+                                       scales = scales, removed = None )
+            else:
+                state = self._grow( state, m )
+                state.vectors[n:n + m] = vocabulary.vectors
+                state.scales[n:n + m] = scales
+
+            state.symbols.extend( [ None ] * m )
+            state.sources.append( ( n, vocabulary, None ) )
+            if self._labels is not None:
+                for ( i, l ) in enumerate( vocabulary.labels ):
+                    self._labels.setdefault( l, [] ).append( n + i )
+
+            self._state = self._added( state.replace( count = n + m ), n )
+
+    def _row( self, symbol ):
+        """Return the row of a stored symbol, given it or its label.  Call
+        with the lock held.
+
+        As symbols made by the algebra may share labels, a symbol is found
+        among the rows with its label as the one stored, or else the first
+        with exactly its vector; a label finds the most recently added.
+        """
+        if not isinstance( symbol, Symbol ):
+            return self._rows()[symbol][-1]
+
+        if not self.factory == symbol.parent:
+            raise ValueError( "You may only use Symbols with " \
+                              "CleanUpMemories which share a " \
+                              "SymbolFactory." )
+        ( state, rows ) = ( self._state, self._rows()[symbol.label()] )
+        for i in rows:
+            if state.symbols[i] is symbol:
+                return i
+        vector = symbol.vector()
+        for i in rows:
+            if array_equal( state.vectors[i], vector ):
+                return i
+        raise KeyError( symbol.label() )
+
+    def _remove( self, state, row ):
+        """Return state with the given row marked as removed."""
+        removed = state.removed
+        if removed is None:
+            removed = full( state.vectors.shape[0], _NEVER, dtype = int64 )
+
+        version = state.version + 1
+        removed[row] = version
+
+        # Other rows with the label remain
+        label = state.label( row )
+        self._labels[label].remove( row )
+        if not self._labels[label]:
+            del self._labels[label]
+        return state.replace( removed = removed, version = version,
+                              dead = state.dead + 1 )
+
+    def remove_symbol( self, symbol ):
+        """Remove a symbol from the memory.  Its row is only marked as
+        removed, the memory is compacted once enough rows have been.
+
+        :param symbol: The symbol, or its label to remove the most recently
+            added symbol with it.
+        :throws KeyError: The symbol is not stored, or no symbol with the
+            label is.
+        """
+        with self._lock:
+            self._state = self._remove( self._state, self._row( symbol ) )
+        self._compact_if_required()
+
+    def replace_symbol( self, old, new ):
+        """Replace a stored symbol with another.  Queries find either the
+        old symbol or the new one, never both or neither.
+
+        :param old: The stored symbol, or its label, see
+            :meth:`remove_symbol`.
+        :param new: The symbol to store in its place.
+        :throws KeyError: Old is not stored.
+        """
+        if not self.factory == new.parent:
+            raise ValueError( "You may only use Symbols with " \
+                              "CleanUpMemories which share a " \
+                              "SymbolFactory." )
+
+        with self._lock:
+            state = self._remove( self._state, self._row( old ) )
+            self._state = self._append( state, new )
+        self._compact_if_required()
+
+    def _compaction_required( self ):
+        state = self._state
+        return ( self.compact_threshold is not None and
+                 state.dead > self.compact_threshold * state.count )
+
+    def _compact_if_required( self ):
+        if not self._compaction_required():
+            return
+
+        if not self.background:
+            self.compact()
+        elif self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(
+                target = self._compact_while_required )
+            self._compactor.daemon = True
+            self._compactor.start()
+
+    def _compact_while_required( self ):
+        # Rows may be removed while compacting, which do not start another
+        # compaction while this thread runs.
+        while self._compaction_required():
+            self.compact()
+
+    def compact( self ):
+        """Copy the rows which have not been removed into new buffers, and
+        rebuild the index from them.
+
+        Rows are copied from the memory as it was when compaction began, so
+        queries and changes may continue meanwhile; any changes are then
+        applied to the compacted memory.
+        """
+        with self._compaction:
+            old = self._state
+            if old.dead == 0:
+                return
+
+            state = self._copy_live( old )
+            with self._lock:
+                self._state = self._catch_up( old, state, self._state )
+                self._labels = None
+
+    def _copy_live( self, old ):
+        """Return a new snapshot holding the rows of old which have not been
+        removed."""
+        ( alive, live ) = ( old.alive(), old.live_rows() )
+        vectors = old.vectors[live]
+        scales = old.scales[live]
+        symbols = [ old.symbols[i] for i in live ]
+
+        # The live rows of each vocabulary are still consecutive
+        sources = []
+        for ( first, vocabulary, offsets ) in old.sources:
+            if first >= old.count:
+                break
+            if offsets is None:
+                offsets = arange( len( vocabulary ) )
+            kept = offsets[alive[first:first + len( offsets )]]
+            if len( kept ) > 0:
+                sources.append( ( int( searchsorted( live, first ) ),
+                                  vocabulary, kept ) )
+
+        codes = code_scales = None
+        if old.codes is not None:
+            ( codes, code_scales ) = ( old.codes[live], old.code_scales[live] )
+
+        index = None
+        if old.index is not None:
+            index = old.index.empty()
+            index.add( vec_normalise( vectors ) )
+
+        return _Snapshot( len( live ), vectors, scales, symbols, sources,
+                          index, codes, code_scales, version = old.version )
+
+    def _catch_up( self, old, state, current ):
+        """Apply the changes made between snapshots old and current to the
+        compacted state of old."""
+        n = state.count
+        added = current.count - old.count
+        gone = []
+
+        # Rows removed since old, by their new numbers
+        if current.removed is not None:
+            live = old.live_rows()
+            removed = current.removed[live]
+            gone.append( flatnonzero( removed <= current.version ) )
+
+        if added > 0:
+            state = self._grow( state, added )
+            rows = slice( old.count, current.count )
+            state.vectors[n:n + added] = current.vectors[rows]
+            state.scales[n:n + added] = current.scales[rows]
+            state.symbols.extend( current.symbols[rows] )
+            state.sources.extend( ( first - old.count + n, vocabulary,
+                                    offsets )
+                                  for ( first, vocabulary, offsets )
+                                  in current.sources
+                                  if old.count <= first < current.count )
+            state = self._added( state.replace( count = n + added ), n )
+
+            if current.removed is not None:
+                removed = current.removed[rows]
+                gone.append( n + flatnonzero( removed <= current.version ) )
+
+        gone = hstack( gone ).astype( intp ) if gone else []
+        if len( gone ) == 0:
+            return state.replace( version = current.version )
+
+        removed = full( state.vectors.shape[0], _NEVER, dtype = int64 )
+        removed[gone] = current.version
+        return state.replace( removed = removed, version = current.version,
+                              dead = len( gone ) )
+
+    def _rank( self, state, similarities, k, ids = None ):
+        """Return (similarity, symbol) lists for each row of similarities,
+        holding the k most similar symbols in descending order.  If given,
+        ids maps the columns of similarities to the rows of state, either
+        for every row or for each row."""
+        if k is None:
+            k = similarities.shape[-1]
+
+        top = vec_top_k( similarities, k )
+        if ids is not None:
+            ids = broadcast_to( ids, similarities.shape )
+            ranked = [ [ ( sims[i], state.symbol( row[i] ) ) for i in indices ]
+                       for ( sims, row, indices ) in zip( similarities, ids,
+                                                           top ) ]
+        else:
+            ranked = [ [ ( sims[i], state.symbol( i ) ) for i in indices ]
+                       for ( sims, indices ) in zip( similarities, top ) ]
+
+        # Removed rows are only ranked if k exceeds the rows remaining
+        if state.dead:
+            ranked = [ [ ( c, s ) for ( c, s ) in r if c > -inf ]
+                       for r in ranked ]
+        return ranked
+
+    def _bury( self, state, similarities, ids = None ):
+        """Return similarities with those of removed rows set to -inf.  If
+        given, ids maps the columns of similarities to the rows of state."""
+        alive = state.alive()
+        if alive is None:
+            return similarities
+        return where( alive if ids is None else alive[ids], similarities,
+                      -inf )
+
+    def _scan( self, state, queries ):
+        """Return the similarities of the normalised queries to every row of
+        state."""
+        n = state.count
+        similarities = dot( queries, state.vectors[:n].T ) * state.scales[:n]
+        return self._bury( state, similarities )
+
+    def _clean_indexed( self, state, query, k ):
+        """Rank the candidates the index proposes for the normalised query,
+        falling back to a full scan when there are none."""
+        # The index may also hold rows added since the snapshot was made
+        ids = state.index.candidates( query )
+        ids = ids[ids < state.count]
+        alive = state.alive()
+        if alive is not None:
+            ids = ids[alive[ids]]
+
+        if len( ids ) == 0:
+            return self._rank( state, self._scan( state, query[newaxis, :] ),
+                               k )[0]
+
+        similarities = dot( state.vectors[ids], query ) * state.scales[ids]
+        return self._rank( state, similarities[newaxis, :], k, ids )[0]
+
+    def _clean_quantised( self, state, queries, k ):
+        """Rank the best candidates for the normalised queries, found by
+        scanning the codes, in full precision."""
+        # Queries are cleaned in blocks, so that the vectors of the
+        # candidates gathered to rescore are at most _SCAN_BLOCK rows.
+        r = self.rescore if self.rescore > k else k
+        step = _SCAN_BLOCK // r if _SCAN_BLOCK > r else 1
+        ranked = []
+        for a in range( 0, len( queries ), step ):
+            ranked.extend( self._rescore( state, queries[a:a + step], r, k ) )
+        return ranked
+
+    def _rescore( self, state, queries, r, k ):
+        """Rank the r best candidates for the normalised queries of the
+        scan of the codes in full precision."""
+        # Scan the codes in blocks of rows, so that only a block at a time
+        # is converted to floating point.
+        n = state.count
+        approximate = empty( ( len( queries ), n ), dtype = float32 )
+        q = queries.astype( float32 )
+        for a in range( 0, n, _SCAN_BLOCK ):
+            b = a + _SCAN_BLOCK if a + _SCAN_BLOCK < n else n
+            approximate[:, a:b] = dot( q, state.codes[a:b].astype( float32 ).T )
+            approximate[:, a:b] *= state.code_scales[a:b]
+        approximate = self._bury( state, approximate )
+
+        ids = vec_top_k( approximate, r )
+        similarities = einsum( "ij,ikj->ik", queries, state.vectors[ids] )
+        similarities = self._bury( state, similarities * state.scales[ids],
+                                   ids )
+        return self._rank( state, similarities, k, ids )
+
+    def _query( self, state, vectors ):
+        """Return the normalised vectors, of the type of the stored ones."""
+        return vec_normalise( vectors ).astype( state.vectors.dtype,
+                                                 copy = False )
+
     @parent_match
-    def clean( self, symbol ):
+    def clean( self, symbol, k = None ):
         """Return a list of symbols along with their similarity to the
-        given symbol."""
-        comparisons = map( lambda s : ( symbol.compare( s ), s ),
-	                   self.symbols )
-        comparisons.sort( key = lambda ( c, s ) : c, reverse = True )
-        return comparisons
-    
+        given symbol, most similar first.
+
+        :param k: If given, only the `k` most similar symbols are returned.
+        :type k: int
+        """
+        state = self._state
+        query = self._query( state, symbol.vector() )
+        if state.index is not None:
+            return self._clean_indexed( state, query, k )
+        if self.scan_dtype is not None and k is not None:
+            return self._clean_quantised( state, query[newaxis, :], k )[0]
+
+        return self._rank( state, self._scan( state, query[newaxis, :] ),
+                           k )[0]
+
     @parent_match
     def cleanest( self, symbol ):
         """Return the cleanest version of symbol in this memory."""
-        return self.clean( symbol )[0][1]
+        return self.clean( symbol, 1 )[0][1]
+
+    def clean_batch( self, symbols, k = None ):
+        """Clean a batch of symbols with a single matrix product.
+
+        :param symbols: The symbols to clean.
+        :type symbols: list of :class:`.Symbol`
+        :param k: If given, only the `k` most similar symbols are returned
+            for each symbol.
+        :type k: int
+
+        :returns: A list holding, for each of the given symbols, the list
+            that :meth:`clean` would return for it.
+        """
+        for symbol in symbols:
+            if not self.factory == symbol.parent:
+                raise ValueError( "You may only use Symbols with " \
+                                  "CleanUpMemories which share a " \
+                                  "SymbolFactory." )
+
+        if len( symbols ) == 0:
+            return []
+
+        return self.clean_vectors( vstack( [ s.vector() for s in symbols ] ),
+                                   k )
+
+    def clean_vectors( self, vectors, k = None ):
+        """Clean the rows of a (N, D) array of vectors as if they were the
+        vectors of symbols, see :meth:`clean_batch`."""
+        state = self._state
+        queries = self._query( state, vectors )
+        if state.index is not None:
+            return [ self._clean_indexed( state, q, k ) for q in queries ]
+        if self.scan_dtype is not None and k is not None:
+            return self._clean_quantised( state, queries, k )
+
+        return self._rank( state, self._scan( state, queries ), k )
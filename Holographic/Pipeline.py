@@ -0,0 +1,201 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Pipeline
+   :synopsis: Streaming encoding and decoding of role/filler records.
+
+A record is a dictionary from roles to fillers, which is encoded as the
+superposition `sum( role (*) filler )`.  A :class:`RecordEncoder` encodes
+an iterable of records, and a :class:`RecordDecoder` decodes an iterable of
+vectors, a chunk at a time, so that streams of any length may be processed
+in bounded memory::
+
+    encoder = RecordEncoder( factory, roles, fillers, chunk_size = 4096 )
+    for vectors in encoder.encode( records ):
+        ...
+
+    decoder = RecordDecoder( memory, roles )
+    for record in decoder.decode( vectors, [ "colour", "shape" ] ):
+        ...
+
+Each chunk is encoded with a single vectorised forward transform of the
+distinct roles and fillers it uses, and a single inverse transform of the
+results; and decoded with one forward transform, one inverse transform and
+one call of :meth:`.CleanUpMemory.clean_vectors`.
+"""
+import itertools
+
+from numpy import add, asarray, conj, empty, newaxis, vstack, zeros
+
+from .utils import vec_from_spectrum, vec_spectrum
+from .Symbol import Symbol
+from .Expression import _transforms_vector
+
+def _chunks( iterable, size ):
+    """Yield lists of up to size consecutive items of an iterable."""
+    iterator = iter( iterable )
+    while True:
+        chunk = list( itertools.islice( iterator, size ) )
+        if not chunk:
+            return
+        yield chunk
+
+def _lookup( symbols, x ):
+    """Return x if it is a Symbol, otherwise the Symbol it labels."""
+    if isinstance( x, Symbol ):
+        return x
+    return symbols[x]
+
+class RecordEncoder( object ):
+    """Encodes streams of role/filler records.
+
+    :param factory: The :class:`.SymbolFactory` of the roles and fillers.
+    :param roles: Maps labels of roles to Symbols, e.g. a
+        :class:`.Vocabulary`.  Not required if records use Symbols as keys.
+    :param fillers: Maps labels of fillers to Symbols.  Not required if
+        records use Symbols as values.
+    :param chunk_size: The number of records encoded at once.
+    :type chunk_size: int
+    """
+
+    def __init__( self, factory, roles = None, fillers = None,
+                  chunk_size = 1024 ):
+        self.factory = factory
+        self.roles = roles
+        self.fillers = fillers
+        self.chunk_size = chunk_size
+
+    def _encode_chunk( self, records ):
+        """Return the (N, D) array of encodings of a list of records."""
+        # Number the distinct Symbols of the chunk, so that each is only
+        # transformed once.
+        symbols = []
+        numbers = {}
+        def number( s ):
+            if id( s ) not in numbers:
+                numbers[id( s )] = len( symbols )
+                symbols.append( s )
+            return numbers[id( s )]
+
+        ( rows, left, right ) = ( [], [], [] )
+        for ( i, record ) in enumerate( records ):
+            for ( role, filler ) in record.items():
+                rows.append( i )
+                left.append( number( _lookup( self.roles, role ) ) )
+                right.append( number( _lookup( self.fillers, filler ) ) )
+
+        d = self.factory.dimensionality()
+        spectra = zeros( ( len( records ), d // 2 + 1 ), dtype = complex )
+        if symbols:
+            f = self.factory._spectra( symbols )
+            add.at( spectra, rows, f[left] * f[right] )
+
+        vectors = vec_from_spectrum( spectra, d,
+                                     backend = self.factory.fft ).astype(
+            self.factory.dtype, copy = False )
+
+        # As for lazy expressions, Symbol types which modify their vectors
+        # are applied to the result alone.
+        if _transforms_vector( self.factory ):
+            vectors = self.factory._transform_rows( [ "" ] * len( vectors ),
+                                                    vectors )
+
+        return vectors
+
+    def encode( self, records, out = None ):
+        """Yield the encodings of an iterable of records, as an (N, D) array
+        for each chunk.
+
+        :param out: Optional (M, D) array, e.g. a :class:`numpy.memmap`, to
+            write the encodings of the first M records into.  The arrays
+            yielded for those records are then views of it, and those for
+            any records beyond them are new arrays.
+        """
+        first = 0
+        for records in _chunks( records, self.chunk_size ):
+            vectors = self._encode_chunk( records )
+            last = first + len( vectors )
+            if out is not None and last <= len( out ):
+                out[first:last] = vectors
+                vectors = out[first:last]
+            elif out is not None and first < len( out ):
+                out[first:] = vectors[:len( out ) - first]
+            first = last
+            yield vectors
+
+    def encode_all( self, records, out = None ):
+        """Return the encodings of a sequence of records as a single (N, D)
+        array, written into out if given."""
+        if out is None:
+            out = empty( ( len( records ), self.factory.dimensionality() ),
+                         dtype = self.factory.dtype )
+        for vectors in self.encode( records, out ):
+            pass
+        return out
+
+class RecordDecoder( object ):
+    """Decodes streams of encoded records.
+
+    :param memory: The :class:`.CleanUpMemory` holding the fillers.
+    :param roles: Maps labels of roles to Symbols, e.g. a
+        :class:`.Vocabulary`.  Not required if roles are given as Symbols.
+    :param chunk_size: The number of vectors decoded at once.
+    :type chunk_size: int
+    """
+
+    def __init__( self, memory, roles = None, chunk_size = 1024 ):
+        self.memory = memory
+        self.factory = memory.factory
+        self.roles = roles
+        self.chunk_size = chunk_size
+
+    def _decode_chunk( self, vectors, roles, spectra ):
+        """Return the list of records decoded from an (N, D) array."""
+        d = self.factory.dimensionality()
+        backend = self.factory.fft
+        fillers = vec_from_spectrum(
+            vec_spectrum( vectors, backend = backend )[:, newaxis, :] *
+            conj( spectra ), d, backend = backend )
+        results = self.memory.clean_vectors( fillers.reshape( -1, d ), 1 )
+
+        n = len( roles )
+        return [ dict( ( role, results[i * n + j][0][1] )
+                       for ( j, role ) in enumerate( roles ) )
+                 for i in range( len( vectors ) ) ]
+
+    def decode( self, vectors, roles ):
+        """Yield a record for each of a stream of encoded vectors, mapping
+        each of the roles to the cleanest filler in the memory.
+
+        :param vectors: An iterable of vectors, or of (N, D) arrays of
+            vectors such as those yielded by :meth:`RecordEncoder.encode`.
+        :param roles: The roles to decode, as labels or Symbols, which are
+            used as the keys of the records.
+        """
+        roles = list( roles )
+        spectra = self.factory._spectra(
+            [ _lookup( self.roles, r ) for r in roles ] )
+
+        d = self.factory.dimensionality()
+        ( pending, held ) = ( [], 0 )
+        for v in vectors:
+            pending.append( asarray( v ).reshape( -1, d ) )
+            held += len( pending[-1] )
+            if held < self.chunk_size:
+                continue
+
+            # Decode all of the whole chunks held, and keep the remainder
+            block = vstack( pending ) if len( pending ) > 1 else pending[0]
+            end = held - held % self.chunk_size
+            for i in range( 0, end, self.chunk_size ):
+                for record in self._decode_chunk(
+                        block[i:i + self.chunk_size], roles, spectra ):
+                    yield record
+            ( pending, held ) = ( [ block[end:] ] if end < held else [],
+                                  held - end )
+
+        if pending:
+            for record in self._decode_chunk( vstack( pending ), roles,
+                                              spectra ):
+                yield record
@@ -0,0 +1,165 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Saturation
+   :synopsis: Saturation functions for vectors, exact and approximate.
+
+A saturation function models the limited range of the values a population
+of neurons can represent.  Each is an object which is called with an array
+of any shape, e.g. a single vector or an (N, D) batch, and may write its
+result into a given buffer, including the input itself::
+
+    saturate = LookupTable()
+    saturate( vectors, out = vectors )
+
+Each approximation records the largest error it makes over all inputs as
+`max_error`.  They model saturation as a table or a few line segments, as
+hardware might.  With numpy the exact :class:`Sigmoid`, which uses the
+vectorised `tanh`, is usually faster than either; see
+`benchmarks/bench_saturation.py`.
+"""
+from numpy import ( array, asarray, clip, diff, empty, float32, hstack, intp,
+                    linspace, multiply, newaxis, result_type, searchsorted,
+                    take, tanh )
+
+class Saturation( object ):
+    """Provides the interface expected of all saturation functions.
+
+    :attr max_error: The largest absolute difference between this function
+        and the one it approximates, over all inputs in double precision.
+    """
+    max_error = 0.
+
+    def __call__( self, x, out = None ):
+        """Saturate each value of an array.
+
+        :param x: The values to saturate.
+        :param out: Optional array of the same shape to hold the result,
+            which may be x.
+        :returns: The saturated values.
+        """
+        raise NotImplementedError
+
+    def _measure( self, exact, points ):
+        """Return the largest error of this function with respect to exact,
+        sampling finely between each of the increasing points at which it is
+        exact and far beyond the outermost."""
+        t = linspace( 0., 1., 2**20 // len( points ) + 2 )[:-1]
+        x = ( points[:-1, newaxis] +
+              t * diff( points )[:, newaxis] ).ravel()
+        x = hstack( [ x, points[-1],
+                      points[0] * array( [ 1e3, 10., 2. ] ),
+                      points[-1] * array( [ 2., 10., 1e3 ] ) ] )
+        return float( abs( self( x ) - exact( x ) ).max() )
+
+class Sigmoid( Saturation ):
+    """The sigmoid `f(x) = g / ( 1 + e**(-s*x) ) - g / 2`, evaluated exactly
+    as the equivalent `g/2 * tanh( s*x / 2 )` with no temporary arrays.
+
+    The defaults are those of :func:`utils.saturation_sigmoid`.
+
+    :param gain: The range, g, of the output values.
+    :param slope: The slope, s, of the sigmoid.
+    """
+
+    def __init__( self, gain = 2.4, slope = 1.75 ):
+        self.gain = gain
+        self.slope = slope
+
+    def __call__( self, x, out = None ):
+        out = multiply( x, 0.5 * self.slope, out = out )
+        tanh( out, out = out )
+        out *= 0.5 * self.gain
+        return out
+
+class LookupTable( Saturation ):
+    """Linear interpolation in a table of values of another saturation
+    function, at evenly spaced points between -limit and limit.  Values
+    beyond the limits take the value at the nearest limit.
+
+    Within the limits the error of linear interpolation is at most
+    `h**2 / 8 * max|f''|` for a spacing h; beyond them it is at most the
+    distance of f(limit) from its asymptote.  For the default sigmoid,
+    where `max|f''|` is about 0.71, a table of 1024 points to a limit of 8
+    is within 2.2e-5, and one of 2048 points within 5.5e-6.  The error
+    measured for a table is given by :attr:`max_error`.
+
+    :param saturation: The function to approximate, by default the exact
+        :class:`Sigmoid`.
+    :param size: The number of points in the table.
+    :type size: int
+    :param limit: The largest magnitude input held in the table.
+    :type limit: float
+    """
+
+    def __init__( self, saturation = None, size = 1024, limit = 8. ):
+        if saturation is None:
+            saturation = Sigmoid()
+        self.saturation = saturation
+        self.size = size
+        self.limit = float( limit )
+
+        # The value at each point and the slope to the next
+        self._step = 2. * self.limit / ( size - 1 )
+        self._values = saturation( linspace( -self.limit, self.limit, size ) )
+        self._slopes = hstack( [ diff( self._values ), [ 0. ] ] )
+
+        self.max_error = self._measure(
+            saturation, linspace( -self.limit, self.limit, size ) )
+
+    def __call__( self, x, out = None ):
+        # Find the position of each input in the table
+        position = multiply( x, 1. / self._step )
+        position += self.limit / self._step
+        clip( position, 0., self.size - 1, out = position )
+        index = position.astype( intp )
+        position -= index
+
+        out = take( self._slopes, index, out = out )
+        out *= position
+        out += take( self._values, index )
+        return out
+
+class PiecewiseLinear( Saturation ):
+    """A few straight lines joining the values of another saturation
+    function at given knots.  Values beyond the outermost knots take the
+    value at the nearest knot.
+
+    The default knots give six segments with a maximum error of about 0.05
+    from the default sigmoid; knots at 0, 0.5, 1, 1.6, 2.5 and 4 give ten
+    segments within 0.023.
+
+    :param saturation: The function to approximate, by default the exact
+        :class:`Sigmoid`.
+    :param knots: The increasing inputs at which the lines meet, which are
+        mirrored for negative inputs.
+    """
+
+    def __init__( self, saturation = None, knots = ( 0., 0.7, 1.5, 3. ) ):
+        if saturation is None:
+            saturation = Sigmoid()
+        self.saturation = saturation
+
+        knots = asarray( knots, dtype = float )
+        self.knots = hstack( [ -knots[:0:-1], knots ] )
+        self._values = saturation( self.knots )
+        self._slopes = diff( self._values ) / diff( self.knots )
+
+        self.max_error = self._measure( saturation, self.knots )
+
+    def __call__( self, x, out = None ):
+        x = asarray( x )
+        if out is None:
+            out = empty( x.shape, dtype = result_type( x, float32 ) )
+
+        # Find the segment of each input before out is overwritten, as x
+        # may be out.
+        segment = searchsorted( self.knots, x ) - 1
+        clip( segment, 0, len( self._slopes ) - 1, out = segment )
+        clip( x, self.knots[0], self.knots[-1], out = out )
+
+        out -= self.knots[segment]
+        out *= self._slopes[segment]
+        out += self._values[segment]
+        return out
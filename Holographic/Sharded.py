@@ -0,0 +1,209 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Sharded
+   :synopsis: Clean up memories split across shared memory shards.
+
+A :class:`ShardedCleanUpMemory` splits the rows of a
+:class:`.CleanUpMemory` between several blocks of shared memory.  Each batch
+of queries is scanned against every shard in parallel, by a pool of threads
+or of processes, and the top results of each shard are merged.  Process
+workers attach to the shards by name, so the vectors are never copied
+between processes.
+"""
+import os
+from concurrent import futures
+from multiprocessing import shared_memory
+
+from numpy import ( dot, hstack, linspace, ndarray, newaxis, prod,
+                    take_along_axis, vstack )
+
+from .utils import vec_normalise, vec_top_k
+
+# Shards attached to by this (worker) process, by the name of the first
+# shard of the memory they belong to, and then by name
+_attached = {}
+
+def _unlinked( name ):
+    """Return True if the owner of a shard has released it."""
+    try:
+        shared_memory.SharedMemory( name = name ).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+def _attach( key, name ):
+    """Attach to a shard created by another process."""
+    if key not in _attached:
+        # A worker of a pool which outlives the memories it searched would
+        # otherwise keep their released shards mapped.
+        for ( other, shards ) in list( _attached.items() ):
+            if _unlinked( other ):
+                for shm in shards.values():
+                    shm.close()
+                del _attached[other]
+        _attached[key] = {}
+
+    shards = _attached[key]
+    if name not in shards:
+        # Workers share the resource tracker of the process which made the
+        # pool, so attaching does not make the block outlive its owner.
+        shards[name] = shared_memory.SharedMemory( name = name )
+    return shards[name]
+
+def _search( rows, queries, k ):
+    """Return the similarities and rows of the k best matches of each of
+    the normalised queries in a block of normalised rows."""
+    similarities = dot( queries, rows.T )
+    top = vec_top_k( similarities, k )
+    return ( take_along_axis( similarities, top, axis = -1 ), top )
+
+def _search_shared( key, name, shape, dtype, queries, k ):
+    """Search a shard in shared memory, from a worker process."""
+    rows = ndarray( shape, dtype = dtype, buffer = _attach( key, name ).buf )
+    return _search( rows, queries, k )
+
+class ShardedCleanUpMemory( object ):
+    """A read-only copy of a :class:`.CleanUpMemory` split into shards which
+    are searched in parallel.  Results are exactly those of the memory it
+    was made from, at the time it was made.
+
+    The shared memory is released by :meth:`close`, or on leaving a `with`
+    block::
+
+        with ShardedCleanUpMemory( memory, executor = "process" ) as sharded:
+            results = sharded.clean_batch( queries, 5 )
+
+    :param memory: The memory to copy, symbols removed from it are not
+        copied.
+    :type memory: :class:`.CleanUpMemory`
+    :param shards: Number of shards, by default one per worker.
+    :type shards: int
+    :param executor: "thread" or "process" to create a pool of that kind,
+        or a :class:`concurrent.futures.Executor` to use.  Threads suffice
+        where the BLAS library releases the GIL; processes avoid contention
+        between the BLAS threads of each shard.
+    :param workers: Number of workers in a created pool, by default the
+        number of CPUs.
+    :type workers: int
+    """
+
+    def __init__( self, memory, shards = None, executor = "thread",
+                  workers = None ):
+        # The memory as it is now, and its rows which have not been removed
+        state = memory._state
+        self.factory = memory.factory
+        self._symbol = state.symbol
+        self._rows = state.live_rows()
+        self._count = len( self._rows )
+
+        workers = workers or os.cpu_count() or 1
+        shards = shards or workers
+        if shards > self._count:
+            shards = self._count or 1
+
+        # Copy the normalised rows into the shards
+        dtype = state.vectors.dtype
+        bounds = linspace( 0, self._count, shards + 1 ).astype( int )
+        self._shards = []
+        for ( first, last ) in zip( bounds[:-1], bounds[1:] ):
+            shape = ( last - first, self.factory.dimensionality() )
+            size = int( prod( shape ) ) * dtype.itemsize
+            shm = shared_memory.SharedMemory( create = True, size = size or 8 )
+            rows = ndarray( shape, dtype = dtype, buffer = shm.buf )
+            rows[:] = state.vectors[self._rows[first:last]]
+            rows *= state.scales[self._rows[first:last], newaxis]
+            self._shards.append( ( shm, first, rows ) )
+
+        # Workers of a pool of processes, however made, attach to the shards
+        self._processes = ( executor == "process" or
+                            isinstance( executor, futures.ProcessPoolExecutor ) )
+        self._owns_executor = executor in ( "thread", "process" )
+        if executor == "thread":
+            self._executor = futures.ThreadPoolExecutor( workers )
+        elif executor == "process":
+            self._executor = futures.ProcessPoolExecutor( workers )
+        else:
+            self._executor = executor
+
+    def __len__( self ):
+        return self._count
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, *args ):
+        self.close()
+
+    def close( self ):
+        """Shut down any pool created for the memory and release the shared
+        memory.  Workers of a pool which is not shut down let go of the
+        released shards when next given a memory to search."""
+        if self._owns_executor:
+            self._executor.shutdown()
+
+        for ( shm, first, rows ) in self._shards:
+            del rows
+            shm.close()
+            shm.unlink()
+        self._shards = []
+
+    def _search( self, queries, k ):
+        """Return the similarities and rows of the k best matches of each
+        normalised query, merged from every shard."""
+        tasks = []
+        for ( shm, first, rows ) in self._shards:
+            if self._processes:
+                task = self._executor.submit( _search_shared,
+                                              self._shards[0][0].name, shm.name,
+                                              rows.shape, rows.dtype.str,
+                                              queries, k )
+            else:
+                task = self._executor.submit( _search, rows, queries, k )
+            tasks.append( ( first, task ) )
+
+        results = [ ( t.result(), first ) for ( first, t ) in tasks ]
+        similarities = hstack( [ s for ( ( s, r ), first ) in results ] )
+        ids = hstack( [ r + first for ( ( s, r ), first ) in results ] )
+
+        top = vec_top_k( similarities, k )
+        return ( take_along_axis( similarities, top, axis = -1 ),
+                 take_along_axis( ids, top, axis = -1 ) )
+
+    def clean_batch( self, symbols, k = None ):
+        """Clean a batch of symbols, see :meth:`.CleanUpMemory.clean_batch`.
+        """
+        for symbol in symbols:
+            if not self.factory == symbol.parent:
+                raise ValueError( "You may only use Symbols with " \
+                                  "CleanUpMemories which share a " \
+                                  "SymbolFactory." )
+
+        if len( symbols ) == 0:
+            return []
+
+        return self.clean_vectors( vstack( [ s.vector() for s in symbols ] ),
+                                   k )
+
+    def clean_vectors( self, vectors, k = None ):
+        """Clean the rows of a (N, D) array of vectors, see
+        :meth:`.CleanUpMemory.clean_vectors`."""
+        queries = vec_normalise( vectors ).astype( self._shards[0][2].dtype,
+                                                   copy = False )
+        ( similarities, ids ) = self._search(
+            queries, self._count if k is None else k )
+
+        return [ [ ( c, self._symbol( self._rows[i] ) )
+                   for ( c, i ) in zip( sims, rows ) ]
+                 for ( sims, rows ) in zip( similarities, ids ) ]
+
+    def clean( self, symbol, k = None ):
+        """Return a list of symbols along with their similarity to the
+        given symbol, most similar first, see :meth:`.CleanUpMemory.clean`.
+        """
+        return self.clean_batch( [ symbol ], k )[0]
+
+    def cleanest( self, symbol ):
+        """Return the cleanest version of symbol in this memory."""
+        return self.clean( symbol, 1 )[0][1]
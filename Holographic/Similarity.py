@@ -0,0 +1,193 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Similarity
+   :synopsis: Cosine similarities between all pairs of two collections.
+
+The cosines of the angles between every Symbol of one collection and every
+Symbol of another form their Gram matrix, which is computed here a block at
+a time by matrix products scaled by the inverse magnitudes of the rows, in
+no more than a given number of bytes::
+
+    cosines = gram( vocabulary, structures )
+    cosines = gram( vocabulary, path = "cosines.npy" )    # Out of core
+    ( rows, columns, values ) = pairs( vocabulary, threshold = 0.9 )
+
+A collection is a :class:`.Vocabulary`, a :class:`.CleanUpMemory`, an
+iterable of Symbols or an (N, D) array of vectors.  Without a second
+collection the first is compared with itself, and as the Gram matrix is
+then symmetric only the blocks on and above the diagonal are computed.
+"""
+from numpy import ( dot, empty, float32, hstack, intp, lib, ndarray, newaxis,
+                    nonzero, ones, result_type, sqrt, triu, vstack, zeros )
+
+from .Memory import CleanUpMemory, _inverse_magnitudes
+from .Vocabulary import Vocabulary
+
+def _rows( collection ):
+    """Return the (N, D) vectors of a collection and their inverse
+    magnitudes."""
+    if isinstance( collection, CleanUpMemory ):
+        return ( collection.vectors, collection.scales )
+
+    if isinstance( collection, Vocabulary ):
+        vectors = collection.vectors
+    elif isinstance( collection, ndarray ):
+        vectors = collection
+    else:
+        vectors = vstack( [ s.vector() for s in collection ] )
+    return ( vectors, _inverse_magnitudes( vectors ) )
+
+def _dtype( a, b ):
+    """Return the type of the cosines of vectors a with vectors b."""
+    return result_type( a, b, float32 )
+
+def _block_shape( n, m, d, itemsize, max_bytes, square = False ):
+    """Return the largest numbers of rows and columns of blocks whose rows,
+    columns and cosines fit in max_bytes, the same if square."""
+    budget = max_bytes // itemsize
+
+    # Take every column at once if there is room for a row as well
+    if not square and m * d + m + d <= budget:
+        rows = ( budget - m * d ) // ( m + d )
+        return ( rows if rows < n else n, m )
+
+    # Otherwise square blocks, s*s + 2*s*d <= budget
+    s = int( sqrt( d * d + budget ) - d )
+    s = s if s > 1 else 1
+    return ( s if s < n else n, s if s < m else m )
+
+def _blocks( a, b, symmetric, max_bytes ):
+    """Yield the blocks of the Gram matrix of the vectors and inverse
+    magnitudes a and b, only on and above the diagonal if symmetric."""
+    ( a_vectors, a_scales ) = a
+    ( b_vectors, b_scales ) = b
+    if not a_vectors.shape[1] == b_vectors.shape[1]:
+        raise ValueError( "Collections must be of the same dimensionality." )
+
+    dtype = _dtype( a_vectors, b_vectors )
+    ( n, m ) = ( len( a_vectors ), len( b_vectors ) )
+    if n == 0 or m == 0:
+        return
+    ( rows, columns ) = _block_shape( n, m, a_vectors.shape[1],
+                                      dtype.itemsize, max_bytes, symmetric )
+
+    # The cosines of every block are found in the same buffer, with the
+    # vectors scaled afterwards rather than normalised in copies.
+    buffer = empty( rows * columns, dtype = dtype )
+    for i in range( 0, n, rows ):
+        x = a_vectors[i:i + rows].astype( dtype, copy = False )
+        for j in range( i if symmetric else 0, m, columns ):
+            y = b_vectors[j:j + columns].astype( dtype, copy = False )
+            cosines = buffer[:len( x ) * len( y )].reshape( len( x ), len( y ) )
+            dot( x, y.T, out = cosines )
+            cosines *= a_scales[i:i + rows, newaxis]
+            cosines *= b_scales[j:j + columns]
+            yield ( i, j, cosines )
+
+def _pair( a, b ):
+    """Return the rows of collections a and b, with b None for a with
+    itself."""
+    rows = _rows( a )
+    return ( rows, rows if b is None else _rows( b ) )
+
+def blocks( a, b = None, max_bytes = 2**28 ):
+    """Yield the Gram matrix of two collections a block at a time.
+
+    Each block is yielded as `( first row, first column, cosines )`.  The
+    array of cosines is reused for the next block, so must be copied to be
+    kept.
+
+    :param a: The collection of the rows.
+    :param b: The collection of the columns, by default a.  If not given
+        only the blocks on and above the diagonal are yielded.
+    :param max_bytes: The most memory used by the vectors and cosines of
+        each block.
+    :type max_bytes: int
+    """
+    ( a_rows, b_rows ) = _pair( a, b )
+    return _blocks( a_rows, b_rows, b is None, max_bytes )
+
+def gram( a, b = None, max_bytes = 2**28, out = None, path = None ):
+    """Return the (N, M) matrix of the cosines of the angles between the
+    Symbols of two collections.
+
+    :param a: The collection of the rows.
+    :param b: The collection of the columns, by default a.
+    :param max_bytes: The most memory used by each block, see
+        :func:`blocks`.
+    :param out: Optional (N, M) array to write the cosines into, e.g. a
+        :class:`numpy.memmap`.
+    :param path: If given, the cosines are written to a new `.npy` file at
+        path, which is memory mapped and returned.
+
+    The cosines are of the type of the vectors, and at least single
+    precision.
+    """
+    ( a_rows, b_rows ) = _pair( a, b )
+    ( n, m ) = ( len( a_rows[0] ), len( b_rows[0] ) )
+    dtype = _dtype( a_rows[0], b_rows[0] )
+    if out is None:
+        if path is not None:
+            out = lib.format.open_memmap( path, mode = "w+", dtype = dtype,
+                                          shape = ( n, m ) )
+        else:
+            out = empty( ( n, m ), dtype = dtype )
+
+    for ( i, j, cosines ) in _blocks( a_rows, b_rows, b is None, max_bytes ):
+        ( r, c ) = cosines.shape
+        out[i:i + r, j:j + c] = cosines
+        if b is None and not i == j:
+            out[j:j + c, i:i + r] = cosines.T
+
+    if path is not None:
+        out.flush()
+    return out
+
+def pairs( a, b = None, threshold = 0.9, max_bytes = 2**28 ):
+    """Return the pairs of Symbols of two collections whose cosine is at
+    least threshold, as arrays of the rows, columns and cosines of the
+    entries of the Gram matrix.
+
+    Without b, each pair of distinct Symbols of a is returned once, with
+    the row less than the column, e.g. to find near duplicates.
+    """
+    ( a_rows, b_rows ) = _pair( a, b )
+    return _pairs( a_rows, b_rows, b is None, threshold, max_bytes )
+
+def _pairs( a, b, symmetric, threshold, max_bytes ):
+    """Return the entries of the Gram matrix of the rows a and b which are
+    at least threshold, above the diagonal only if symmetric."""
+    ( rows, columns, values ) = ( [], [], [] )
+    for ( i, j, cosines ) in _blocks( a, b, symmetric, max_bytes ):
+        selected = cosines >= threshold
+        if symmetric and i == j:
+            selected &= triu( ones( cosines.shape, dtype = bool ), 1 )
+        ( r, c ) = nonzero( selected )
+        rows.append( r + i )
+        columns.append( c + j )
+        values.append( cosines[r, c] )
+
+    if not rows:
+        return ( zeros( 0, dtype = intp ), zeros( 0, dtype = intp ),
+                 zeros( 0 ) )
+    return ( hstack( rows ), hstack( columns ), hstack( values ) )
+
+def sparse( a, b = None, threshold = 0.9, max_bytes = 2**28 ):
+    """Return the entries of the Gram matrix of two collections which are
+    at least threshold as a :class:`scipy.sparse.coo_matrix`, which
+    requires scipy.  Without b, both triangles of the symmetric matrix are
+    filled, and the diagonal is left out."""
+    import scipy.sparse
+
+    ( a_rows, b_rows ) = _pair( a, b )
+    ( rows, columns, values ) = _pairs( a_rows, b_rows, b is None,
+                                        threshold, max_bytes )
+    ( n, m ) = ( len( a_rows[0] ), len( b_rows[0] ) )
+    if b is None:
+        ( rows, columns, values ) = ( hstack( [ rows, columns ] ),
+                                      hstack( [ columns, rows ] ),
+                                      hstack( [ values, values ] ) )
+    return scipy.sparse.coo_matrix( ( values, ( rows, columns ) ),
+                                    shape = ( n, m ) )
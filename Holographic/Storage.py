@@ -0,0 +1,244 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Storage
+   :synopsis: Memory mapped storage of vocabularies and clean up memories.
+
+A store is a directory holding:
+
+* `vectors.bin` -- the (N, D) array of vectors, as raw row-major values;
+* `scales.bin` -- the inverse magnitude of each vector;
+* `labels.txt` -- the label of each vector, one JSON string per line;
+* `meta.json` -- the number of rows, the type of their values (that of the
+  factory), and the parameters of the :class:`.SymbolFactory` the Symbols
+  belong to.
+
+Stores are opened with :class:`numpy.memmap`, so opening one costs little
+more than reading the labels, and every process which opens the same store
+shares the pages of the operating system's file cache.  New Symbols are
+appended to the end of the files; the count in `meta.json` is replaced
+last, so that stores opened meanwhile only see complete rows.
+
+Labels are stored as strings, so Symbols built by the Symbol algebra are
+restored with an :class:`.AtomLabel` of their rendered label.
+"""
+import importlib
+import io
+import json
+import os
+
+from numpy import ascontiguousarray, memmap, vstack, zeros
+
+from .Symbol import SymbolFactory
+from .Memory import CleanUpMemory, _inverse_magnitudes
+from .Vocabulary import Vocabulary
+
+FORMAT_VERSION = 1
+
+def _name( f ):
+    """Return the "module:name" of a function or class, or None if it can
+    not be imported by that name (e.g., a lambda)."""
+    try:
+        name = "%s:%s" % ( f.__module__, f.__name__ )
+        if _resolve( name ) is f:
+            return name
+    except ( AttributeError, ImportError ):
+        pass
+    return None
+
+def _resolve( name ):
+    """Return the function or class with the given "module:name"."""
+    ( module, attribute ) = name.split( ":" )
+    try:
+        module = importlib.import_module( module )
+    except ImportError:
+        # Stores written before the library was a package name its modules
+        # without the package
+        module = importlib.import_module( "." + module, __package__ )
+    return getattr( module, attribute )
+
+def _read_meta( path ):
+    with io.open( os.path.join( path, "meta.json" ), encoding = "utf-8" ) as f:
+        meta = json.load( f )
+
+    if not meta["version"] == FORMAT_VERSION:
+        raise ValueError( "Unsupported store version %s." % meta["version"] )
+    return meta
+
+def _write_meta( path, meta ):
+    # Write to a temporary file and then replace the old one, so that the
+    # update appears all at once.
+    temporary = os.path.join( path, "meta.json.tmp" )
+    with io.open( temporary, "w", encoding = "utf-8" ) as f:
+        f.write( json.dumps( meta, indent = 2, sort_keys = True ) )
+    os.replace( temporary, os.path.join( path, "meta.json" ) )
+
+def _read_labels( path, n ):
+    """Return the first n labels of a store, and the number of bytes of
+    `labels.txt` which hold them."""
+    ( labels, size ) = ( [], 0 )
+    with io.open( os.path.join( path, "labels.txt" ), "rb" ) as f:
+        for ( i, line ) in zip( range( n ), f ):
+            labels.append( json.loads( line.decode( "utf-8" ) ) )
+            size += len( line )
+    return ( labels, size )
+
+def _truncate( path, name, size ):
+    """Discard anything beyond the first size bytes of a file of a store."""
+    with io.open( os.path.join( path, name ), "r+b" ) as f:
+        f.truncate( size )
+
+def _append_rows( path, count, label_bytes, labels, vectors, scales, dtype ):
+    """Append rows, as values of dtype, to the data files of a store which
+    holds count rows, in the first label_bytes of `labels.txt`.
+
+    Anything beyond those rows, left by an append which did not finish
+    before the count was updated, is discarded first.
+    """
+    vectors = ascontiguousarray( vectors, dtype = dtype )
+    scales = ascontiguousarray( scales, dtype = dtype )
+    _truncate( path, "vectors.bin",
+               count * vectors.shape[1] * vectors.itemsize )
+    _truncate( path, "scales.bin", count * scales.itemsize )
+    _truncate( path, "labels.txt", label_bytes )
+
+    with open( os.path.join( path, "vectors.bin" ), "ab" ) as f:
+        f.write( vectors.tobytes() )
+    with open( os.path.join( path, "scales.bin" ), "ab" ) as f:
+        f.write( scales.tobytes() )
+    with io.open( os.path.join( path, "labels.txt" ), "a",
+                  encoding = "utf-8" ) as f:
+        for label in labels:
+            f.write( u"%s\n" % json.dumps( label ) )
+
+def _save( path, factory, labels, vectors, scales ):
+    """Create a new store holding the given rows."""
+    if not os.path.isdir( path ):
+        os.makedirs( path )
+    for name in ( "vectors.bin", "scales.bin", "labels.txt" ):
+        io.open( os.path.join( path, name ), "wb" ).close()
+
+    _append_rows( path, 0, 0, [ u"%s" % l for l in labels ], vectors,
+                  scales, factory.dtype )
+    _write_meta( path, {
+        "version" : FORMAT_VERSION,
+        "count" : len( labels ),
+        "dimensionality" : factory.dimensionality(),
+        "dtype" : factory.dtype.name,
+        "generator" : _name( factory._vec_generator ),
+        "symbol_type" : _name( factory._symbol_type ),
+        "seed" : factory.seed if factory._labelled() else None,
+    } )
+
+def save_vocabulary( vocabulary, path ):
+    """Save a :class:`.Vocabulary` as a new store at path, replacing any
+    store already there."""
+    _save( path, vocabulary.factory, vocabulary.labels, vocabulary.vectors,
+           _inverse_magnitudes( vocabulary.vectors ) )
+
+def save_memory( memory, path ):
+    """Save the symbols of a :class:`.CleanUpMemory` as a new store at
+    path, replacing any store already there."""
+    _save( path, memory.factory, [ s.label() for s in memory.symbols ],
+           memory.vectors, memory.scales )
+
+def append( path, symbols ):
+    """Append Symbols to the store at path without rewriting it.
+
+    :param symbols: The Symbols to append, e.g., a :class:`.Vocabulary`.
+    :type symbols: iterable of :class:`.Symbol`
+
+    :throws ValueError: The Symbols are of the wrong dimensionality, or
+        their labels are not distinct from each other and from those
+        already in the store.
+    """
+    meta = _read_meta( path )
+    symbols = list( symbols )
+    if len( symbols ) == 0:
+        return
+
+    vectors = vstack( [ s.vector() for s in symbols ] )
+    if not vectors.shape[1] == meta["dimensionality"]:
+        raise ValueError( "Can only append Symbols with dimensionality " \
+                          "%d" % meta["dimensionality"] )
+
+    # The store is loaded as a Vocabulary, so its labels must be distinct
+    labels = [ u"%s" % s.label() for s in symbols ]
+    ( existing, label_bytes ) = _read_labels( path, meta["count"] )
+    seen = set( existing )
+    for label in labels:
+        if label in seen:
+            raise ValueError( "The label %r is repeated, labels in a store " \
+                              "must be distinct." % label )
+        seen.add( label )
+
+    _append_rows( path, meta["count"], label_bytes, labels, vectors,
+                  _inverse_magnitudes( vectors ), meta["dtype"] )
+    meta["count"] += len( symbols )
+    _write_meta( path, meta )
+
+def _open( path, factory ):
+    """Return the factory, labels, vectors and scales of a store."""
+    meta = _read_meta( path )
+    ( n, d ) = ( meta["count"], meta["dimensionality"] )
+
+    if factory is None:
+        if meta["generator"] is None or meta["symbol_type"] is None:
+            raise ValueError( "The store does not record how to make its " \
+                              "SymbolFactory, one must be given." )
+        factory = SymbolFactory( d, _resolve( meta["generator"] ),
+                                 _resolve( meta["symbol_type"] ),
+                                 seed = meta["seed"], dtype = meta["dtype"] )
+    elif not factory.dimensionality() == d:
+        raise ValueError( "The store holds Symbols of dimensionality %d." % d )
+
+    labels = _read_labels( path, n )[0]
+
+    if n == 0:
+        vectors = zeros( ( 0, d ), dtype = meta["dtype"] )
+        scales = zeros( 0, dtype = meta["dtype"] )
+    else:
+        vectors = memmap( os.path.join( path, "vectors.bin" ),
+                          dtype = meta["dtype"], mode = "r", shape = ( n, d ) )
+        scales = memmap( os.path.join( path, "scales.bin" ),
+                         dtype = meta["dtype"], mode = "r", shape = ( n, ) )
+
+    return ( factory, labels, vectors, scales )
+
+def load_vocabulary( path, factory = None ):
+    """Open the store at path as a :class:`.Vocabulary` whose vectors are
+    memory mapped from the store.
+
+    :param factory: The factory the Symbols should belong to.  By default a
+        new factory is made from the parameters recorded in the store.  If
+        its dtype is not that of the store the vectors are converted, and
+        so copied into memory rather than mapped.
+    :type factory: :class:`.SymbolFactory`
+
+    :throws ValueError: The labels of the store are not distinct, as may be
+        those of a saved memory, which can be opened with
+        :func:`load_memory`.
+    """
+    ( factory, labels, vectors, scales ) = _open( path, factory )
+    return Vocabulary( factory, labels, vectors, transformed = True )
+
+def load_memory( path, factory = None, index = None, **kwargs ):
+    """Open the store at path as a :class:`.CleanUpMemory` which shares the
+    memory mapped vectors of the store.  As in any memory, several Symbols
+    may share a label.
+
+    :param factory: The factory the Symbols should belong to.  By default a
+        new factory is made from the parameters recorded in the store.  If
+        its dtype is not that of the store the vectors are converted, and
+        so copied into memory rather than mapped.
+    :type factory: :class:`.SymbolFactory`
+    :param index: Optional :class:`.Index` for the memory.
+    :param kwargs: Other arguments of the :class:`.CleanUpMemory`, e.g.
+        `scan_dtype`.
+    """
+    ( factory, labels, vectors, scales ) = _open( path, factory )
+    memory = CleanUpMemory( factory, index, **kwargs )
+    memory._extend( Vocabulary( factory, labels, vectors, transformed = True,
+                                distinct = False ), scales )
+    return memory
@@ -0,0 +1,137 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Superposition
+   :synopsis: Accumulate large superpositions of Symbols in place.
+
+Composing many Symbols one at a time with :meth:`.Symbol.compose` makes a
+new Symbol, vector and label at every step.  A :class:`Superposition`
+instead adds each term into a buffer in place, at a cost of O(D), and only
+makes a Symbol when asked::
+
+    trace = Superposition( factory )
+    for ( role, filler ) in pairs:
+        trace.add_binding( role, filler )
+    trace.subtract_binding( role, old_filler )
+    memory = trace.symbol( "trace" )
+
+Bindings are accumulated as spectra, so adding `role (*) filler` costs
+no inverse transform, and no transform at all for Symbols whose spectra
+are already known.  A single inverse transform is made for each snapshot.
+"""
+from numpy import asarray, broadcast_to, dot, zeros
+
+from .utils import vec_from_spectrum
+from .Symbol import Symbol
+
+class Superposition( object ):
+    """A weighted sum of Symbols, and bindings of Symbols, which may be
+    added to and subtracted from in place.
+
+    The sum is held in double precision whatever the dtype of the factory,
+    so that the error of adding many terms does not grow.
+
+    :param factory: The :class:`.SymbolFactory` the Symbols belong to.
+    :type factory: :class:`.SymbolFactory`
+    :param label: The default label of snapshots.
+    """
+
+    def __init__( self, factory, label = "~sum" ):
+        self.factory = factory
+        self.label = label
+
+        # The sum is held as the sum of a vector and the inverse transform
+        # of a spectrum.
+        d = factory.dimensionality()
+        self._vector = zeros( d )
+        self._spectrum = zeros( d // 2 + 1, dtype = complex )
+        self._bound = False  # Whether anything was added to the spectrum
+
+    def _check( self, *symbols ):
+        """Raise a ValueError unless the Symbols belong to the factory."""
+        for s in symbols:
+            if not s.parent == self.factory:
+                raise ValueError( "Only Symbols drawn from the same " \
+                                  "SymbolFactory may be used in this " \
+                                  "operation." )
+
+    def add( self, symbol, weight = 1. ):
+        """Add weight * symbol to the sum.
+
+        :returns: This Superposition, so that calls may be chained.
+        """
+        self._check( symbol )
+        if weight == 1:
+            self._vector += symbol.vector()
+        else:
+            self._vector += weight * symbol.vector()
+        return self
+
+    def subtract( self, symbol, weight = 1. ):
+        """Subtract weight * symbol from the sum, e.g. to forget a term
+        which was added before."""
+        return self.add( symbol, -weight )
+
+    def add_binding( self, a, b, weight = 1. ):
+        """Add weight * ( a (*) b ) to the sum.  The spectra of a and b are
+        kept by them, so Symbols bound many times are only transformed
+        once."""
+        self._check( a, b )
+        if weight == 1:
+            self._spectrum += a.spectrum() * b.spectrum()
+        else:
+            self._spectrum += weight * ( a.spectrum() * b.spectrum() )
+        self._bound = True
+        return self
+
+    def subtract_binding( self, a, b, weight = 1. ):
+        """Subtract weight * ( a (*) b ) from the sum."""
+        return self.add_binding( a, b, -weight )
+
+    def add_bindings( self, a, b, weights = None ):
+        """Add the bindings `a[i] (*) b[i]` of two lists of Symbols, as for
+        :meth:`.SymbolFactory.bind_many`, with a single vectorised transform
+        of any spectra not already known.
+
+        :param weights: Optional weight of each binding.
+        """
+        a = [ a ] if isinstance( a, Symbol ) else list( a )
+        b = [ b ] if isinstance( b, Symbol ) else list( b )
+        if not ( len( a ) == len( b ) or len( a ) == 1 or len( b ) == 1 ):
+            raise ValueError( "Lists of Symbols must be of the same length." )
+
+        # Lists of one Symbol broadcast against the other list
+        products = self.factory._spectra( a ) * self.factory._spectra( b )
+        if weights is None:
+            self._spectrum += products.sum( axis = 0 )
+        else:
+            weights = broadcast_to( asarray( weights, dtype = float ),
+                                    products.shape[:1] )
+            self._spectrum += dot( weights, products )
+        self._bound = True
+        return self
+
+    def clear( self ):
+        """Remove every term from the sum."""
+        self._vector[:] = 0.
+        self._spectrum[:] = 0.
+        self._bound = False
+
+    def vector( self ):
+        """:returns: A copy of the vector of the sum, as it is now."""
+        v = self._vector.copy()
+        if self._bound:
+            v += vec_from_spectrum( self._spectrum, v.size,
+                                    backend = self.factory.fft )
+        return v
+
+    def symbol( self, label = None ):
+        """Make a Symbol of the sum as it is now.  Later changes to the sum
+        do not affect the Symbol.
+
+        :param label: The label of the Symbol, by default that given to the
+            Superposition.
+        """
+        return self.factory._result( self.label if label is None else label,
+                                     self.vector() )
@@ -6,20 +6,38 @@
 .. moduleauthor:: Andrew Mundy <mundy@cs.manchester.ac.uk>
 
 """
-from utils import *
-
-def parent_match( f ):
-    # Create a new function which first ensures that args' parents match
-    def f_( self, other ):
-        if not self.parent == other.parent:
-            raise ValueError( "Only Symbols drawn from the same " \
-                          "SymbolFactory may be used in this operation." )
-
-        return f( self, other )
-
-    # Copy over the documentation
-    f_.__doc__ = f.__doc__
-    return f_
+import numbers
+
+from numpy import ( array, asarray, complex64, conj, empty, empty_like,
+                    float64, floating, hstack, issubdtype, linspace, ndarray,
+                    random, result_type, shape, vstack, zeros )
+
+from . import FFT
+from .utils import ( vec_cosine, vec_from_spectrum, vec_generate_labelled,
+                     vec_magnitude, vec_spectrum )
+from .Label import OpLabel, as_label
+from .Cache import OperationCache
+from .Saturation import Saturation, Sigmoid
+
+def _parent_mismatch():
+    # Raise the error for an operation on Symbols of different factories
+    raise ValueError( "Only Symbols drawn from the same " \
+                      "SymbolFactory may be used in this operation." )
+
+def _read_only( vector, dtype = float ):
+    # Return a read-only array of dtype with the contents of vector, copying
+    # it unless neither it nor any array it views can be written to.
+    vector = asarray( vector, dtype = dtype )
+
+    base = vector
+    while isinstance( base, ndarray ):
+        if base.flags.writeable:
+            vector = vector.copy()
+            vector.flags.writeable = False
+            break
+        base = base.base
+
+    return vector
 
 class SymbolFactory( object ):
     """
@@ -38,26 +56,225 @@ class SymbolFactory( object ):
     :param vec_generator: The function used to generate any vectors
         used to represent symbols generated by this factory.
         This function must accept a dimensionality and return a valid
-        vector of that size.
+        vector of that size.  If it also accepts a number of vectors, n,
+        and returns a (n, dimensionality) array, :meth:`new_symbols` will
+        generate all of its vectors in one call.  If a seed is given the
+        function must accept a numpy Generator as the keyword argument
+        `rng` and draw from it.
     :type vec_generator: function
     :param symbol_type: The function used to turn a vector and a
         label into a valid Symbol.  This function must accept a label
         and a vector and return an instance of a Symbol, or Symbol
         derived class.
     :type symbol_type: class or function
+    :param lazy: If True, operations on Symbols from this factory are
+        recorded and only evaluated when a result is required, see
+        :mod:`.Expression`.
+    :type lazy: bool
+    :param seed: Makes generation reproducible.  Given an integer, the
+        vector of each new Symbol is determined by the seed and its label
+        alone (see :func:`utils.rng_for_label`), so any Symbol may be
+        regenerated in any process.  Given a numpy Generator, vectors are
+        drawn from it in turn.  By default the global numpy random state is
+        used.
+    :type seed: int or :class:`numpy.random.Generator`
+    :param dtype: The floating point type of the vectors of Symbols made by
+        this factory.  float32 halves the memory and bandwidth used by
+        vectors, and their spectra, at the cost of precision.
+    :type dtype: numpy dtype
+    :param cache_bytes: If given, the results of binding, unbinding,
+        inverting and exponentiating Symbols are kept in an
+        :class:`.OperationCache` of this many bytes, :attr:`cache`, so that
+        repeated operations on the same Symbols are not recomputed.
+    :type cache_bytes: int
+    :param debug: If True, the results of operations are checked and
+        copied as any other vector given to :meth:`make_symbol`.  By default
+        they are trusted, and the Symbols made take ownership of them.
+    :type debug: bool
+    :param fft: The :class:`.FFTBackend`, or name of one, used to transform
+        the vectors of Symbols made by this factory.  By default that set
+        with :func:`FFT.set_backend` is used.
+    :type fft: :class:`.FFTBackend` or string
 
     """
-    def __init__( self, dimensionality, vec_generator, symbol_type ):
+    def __init__( self, dimensionality, vec_generator, symbol_type,
+                  lazy = False, seed = None, dtype = float64,
+                  cache_bytes = None, debug = False, fft = None ):
         # Store the constants
-        self.dimensionality = lambda : dimensionality
-        self.generate_vector = lambda : vec_generator( self.dimensionality() )
+        self._dimensionality = dimensionality
+        self._vec_generator = vec_generator
         self._symbol_type = symbol_type
+        self.lazy = lazy
+        self.dtype = result_type( dtype )
+        if not issubdtype( self.dtype, floating ):
+            raise ValueError( "Symbols must have floating point vectors." )
+
+        # Vectors without labels are drawn in turn from a Generator, even if
+        # those with labels are derived from the seed.
+        self.seed = seed
+        if isinstance( seed, numbers.Integral ):
+            self._rng = random.default_rng( seed )
+        else:
+            self._rng = seed
+
+        # Whether symbol_type modifies vectors, and the class of Symbol which
+        # may be made directly from trusted vectors if it does not.  These
+        # are found when first required.
+        self.debug = debug
+        self._transforms_vector = None
+        self._trusted_type = None
+
+        # The transforms, None to follow the default backend
+        self.fft = None if fft is None else FFT.get_backend( fft )
+
+        # The results of recent operations, if requested
+        self.cache = None
+        if cache_bytes:
+            self.cache = OperationCache( cache_bytes )
+
+    def _probe( self ):
+        """Find whether the Symbols made by the factory modify their
+        vectors, and whether they may be adopted, with a trial Symbol."""
+        s = self.make_symbol( "", zeros( self._dimensionality ) )
+        self._transforms_vector = s._transforms_vector
+
+        # Only Symbol classes whose construction does nothing more than
+        # hold the vector may be made without it.
+        if ( not s._transforms_vector and
+             type( s ).__init__ is Symbol.__init__ ):
+            self._trusted_type = type( s )
+
+    def _result( self, label, vector, spectrum = None ):
+        """Make a Symbol from a new vector computed by an operation, and
+        optionally its spectrum.
+
+        The Symbol takes ownership of the vector, which must not be used
+        elsewhere.  Unless the factory is in debug mode the vector is
+        trusted to be of the right size, and is neither checked nor copied.
+        """
+        if self._transforms_vector is None:
+            self._probe()
+
+        if self.debug or self._trusted_type is None:
+            s = self.make_symbol( label, vector )
+        else:
+            if not vector.dtype == self.dtype:
+                vector = vector.astype( self.dtype )
+            vector.flags.writeable = False
+            s = self._trusted_type._adopt( self, label, vector )
+
+        if spectrum is not None and not s._transforms_vector:
+            s._spectrum = spectrum
+        return s
+
+    def _defer( self, operation, operands, argument = None ):
+        """Return a LazySymbol recording an operation on Symbols."""
+        from .Expression import LazySymbol
+        return LazySymbol( self, operation, operands, argument )
+
+    def dimensionality( self ):
+        """:returns: The dimensionality of symbols made by this factory."""
+        return self._dimensionality
+
+    def _labelled( self ):
+        """Return True if vectors are derived from their labels."""
+        return isinstance( self.seed, numbers.Integral )
+
+    def generate_vector( self, label = None ):
+        """:returns: A new vector from the factory's generation function.
+            If the factory has an integer seed and a label is given, the
+            vector is that of the Symbol with the label.
+        """
+        if self.seed is None:
+            return self._vec_generator( self._dimensionality )
+
+        if label is not None and self._labelled():
+            return vec_generate_labelled( self._dimensionality, [ label ],
+                                          self.seed, self._vec_generator )[0]
+
+        return self._vec_generator( self._dimensionality, rng = self._rng )
+
+    def generate_vectors( self, n, labels = None, processes = None ):
+        """:returns: A (n, D) array of new vectors from the factory's
+            generation function.  These are generated with a single call if
+            the function accepts a number of vectors, and one at a time
+            otherwise.
+
+        :param labels: If the factory has an integer seed, the n labels
+            from which to derive the vectors.
+        :param processes: Number of processes to derive vectors from labels
+            with, the result is the same whatever the number.
+        :type processes: int
+        """
+        if labels is not None and self._labelled():
+            return self._generate_labelled( list( labels ), processes )
+
+        kwargs = {} if self.seed is None else { "rng" : self._rng }
+        vectors = None
+        if self._generates_many( n, kwargs ):
+            vectors = self._vec_generator( self._dimensionality, n, **kwargs )
+
+        if vectors is None or not shape( vectors ) == ( n, self._dimensionality ):
+            vectors = empty( ( n, self._dimensionality ) )
+            for i in range( n ):
+                vectors[i] = self.generate_vector()
+
+        return vectors
+
+    def _generates_many( self, n, kwargs ):
+        """Return True if the generation function accepts a number of
+        vectors, as well as the dimensionality and kwargs."""
+        import inspect
+
+        try:
+            inspect.signature( self._vec_generator ).bind(
+                self._dimensionality, n, **kwargs )
+        except ( TypeError, ValueError ):
+            # Arguments it does not accept, or a signature which can not be
+            # found, as for some builtins.
+            return False
+        return True
+
+    def _generate_labelled( self, labels, processes ):
+        """Derive the vectors for the labels, in parallel if requested."""
+        if processes is None or processes <= 1 or len( labels ) < processes:
+            return vec_generate_labelled( self._dimensionality, labels,
+                                          self.seed, self._vec_generator )
+
+        import functools
+        import multiprocessing
+
+        # Split the labels into a contiguous chunk for each process
+        bounds = linspace( 0, len( labels ), processes + 1 ).astype( int )
+        chunks = [ labels[a:b] for ( a, b ) in zip( bounds[:-1], bounds[1:] ) ]
+        generate = functools.partial( vec_generate_labelled,
+                                      self._dimensionality, seed = self.seed,
+                                      generator = self._vec_generator )
+
+        pool = multiprocessing.Pool( processes )
+        try:
+            return vstack( pool.map( generate, chunks ) )
+        finally:
+            pool.close()
+            pool.join()
     
+    def _transform_rows( self, labels, vectors ):
+        """Return the vectors of Symbols made with the labels from the rows
+        of vectors, as modified by the Symbol type.  Symbol classes with a
+        :class:`.Saturation` saturate the whole array at once."""
+        saturation = getattr( self._symbol_type, "saturation", None )
+        if isinstance( saturation, Saturation ):
+            vectors = asarray( vectors, dtype = self.dtype )
+            return saturation( vectors, out = empty_like( vectors ) )
+
+        return vstack( [ self.make_symbol( l, v ).vector()
+                         for ( l, v ) in zip( labels, vectors ) ] )
+
     def make_symbol( self, label, vector ):
         """Make a new symbol with the given label and vector.
     
         :param label: The label to be associated with the new symbol.
-        :type label: str
+        :type label: str or :class:`.Label`
         :param vector: The vector to be used for the new symbol.
     
         :returns: A Symbol of the type generated by the factory with the given
@@ -67,7 +284,7 @@ class SymbolFactory( object ):
 
         :throws ValueError: The vector provided has the wrong dimensionality.
         """
-        vector = array( vector )
+        vector = asarray( vector )
         
         if not vector.size == self.dimensionality():
             raise ValueError( "Can only make Symbols with dimensionality " \
@@ -88,11 +305,123 @@ class SymbolFactory( object ):
             given label by the factory's symbol creation function.
         """
         # Create a vector
-        v = self.generate_vector()
+        v = self.generate_vector( label )
 
         # Create and return the symbol
         return self.make_symbol( label, v )
     
+    def new_symbols( self, labels, processes = None ):
+        """Generate new symbols for each of the given labels.
+
+        :param labels: The distinct labels of the new Symbols.
+        :type labels: iterable of strings
+        :param processes: If the factory has an integer seed, the number of
+            processes to generate the vectors with.
+        :type processes: int
+
+        :returns: A :class:`.Vocabulary` holding the new Symbols, the vectors
+            of which are the rows of a single array.
+        """
+        from .Vocabulary import Vocabulary
+
+        # Create the vectors, we are the only holder so they need not be
+        # copied to be made read-only.
+        labels = list( labels )
+        vectors = asarray( self.generate_vectors( len( labels ), labels,
+                                                  processes ),
+                           dtype = self.dtype )
+        vectors.flags.writeable = False
+
+        return Vocabulary( self, labels, vectors )
+
+    def _spectra( self, symbols ):
+        """Return the spectrum of a Symbol, or the (N, D/2 + 1) array of
+        spectra of a list of Symbols.  The spectra not already known are
+        found with one vectorised transform, and are not kept."""
+        if isinstance( symbols, Symbol ):
+            symbols = [ symbols ]
+        for s in symbols:
+            if not s.parent == self:
+                raise ValueError( "Only Symbols drawn from the same " \
+                                  "SymbolFactory may be used in this " \
+                                  "operation." )
+
+        # Unevaluated LazySymbols are best asked for their spectrum
+        missing = [ i for ( i, s ) in enumerate( symbols )
+                    if s._spectrum is None and s._vector is not None ]
+        spectra = empty( ( len( symbols ), self._dimensionality // 2 + 1 ),
+                         dtype = result_type( self.dtype, complex64 ) )
+        if len( missing ) > 0:
+            spectra[missing] = vec_spectrum(
+                vstack( [ symbols[i].vector() for i in missing ] ),
+                backend = self.fft )
+        for ( i, s ) in enumerate( symbols ):
+            if s._spectrum is not None or s._vector is None:
+                spectra[i] = s.spectrum()
+
+        return spectra
+
+    def _combine_many( self, operation, a, b ):
+        """Bind or unbind lists of Symbols, see :meth:`bind_many`."""
+        a = [ a ] if isinstance( a, Symbol ) else list( a )
+        b = [ b ] if isinstance( b, Symbol ) else list( b )
+        if not ( len( a ) == len( b ) or len( a ) == 1 or len( b ) == 1 ):
+            raise ValueError( "Lists of Symbols must be of the same length." )
+        n = len( a ) if len( b ) == 1 else len( b )
+        pairs = list( zip( a * n if len( a ) == 1 else a,
+                           b * n if len( b ) == 1 else b ) )
+
+        for s in a + b:
+            if s.parent is not self:
+                _parent_mismatch()
+
+        if self.lazy:
+            return [ self._defer( operation, pair ) for pair in pairs ]
+
+        f_a = self._spectra( a )
+        f_b = self._spectra( b )
+        f_ = f_a * ( conj( f_b ) if operation == "unbind" else f_b )
+
+        # Keep only the real parts of the terms which survive the inverse
+        # transform as real, as for single Symbols.
+        f_[:, 0] = f_[:, 0].real
+        if self._dimensionality % 2 == 0:
+            f_[:, -1] = f_[:, -1].real
+
+        # The rows of the read-only results are used by the Symbols directly
+        v_ = vec_from_spectrum( f_, self._dimensionality,
+                                backend = self.fft ).astype( self.dtype,
+                                                             copy = False )
+        v_.flags.writeable = False
+
+        return [ self._result( OpLabel( operation, ( x._label, y._label ) ),
+                               v_[i], f_[i] )
+                 for ( i, ( x, y ) ) in enumerate( pairs ) ]
+
+    def bind_many( self, a, b ):
+        """Bind Symbols in batches, with a single vectorised transform.
+
+        :param a: A Symbol or list of Symbols.
+        :param b: A Symbol or list of Symbols.  If both a and b are lists
+            they must be of the same length, otherwise the single Symbol is
+            used with every Symbol of the list.
+        :returns: The list of Symbols `a[i] (*) b[i]`.
+        """
+        return self._combine_many( "bind", a, b )
+
+    def unbind_many( self, a, b ):
+        """Unbind Symbols in batches, with a single vectorised transform.
+        For example, to decode a role from many structures::
+
+            fillers = factory.unbind_many( structures, role )
+
+        :param a: A Symbol or list of Symbols.
+        :param b: A Symbol or list of Symbols to unbind from those of a,
+            broadcast as for :meth:`bind_many`.
+        :returns: The list of Symbols `a[i] (*) b[i]'`.
+        """
+        return self._combine_many( "unbind", a, b )
+
     def compositional_identity( self ):
         """:returns: The null symbol for composition."""
         # Create the vector
@@ -126,19 +455,78 @@ class Symbol( object ):
         this Symbol was derived.
     :type parent: :class:`.SymbolFactory`
     :param label: The label for this Symbol, e.g., "dog".
-    :type label: string
-    :param vector: Vector to represent this Symbol.
+    :type label: string or :class:`.Label`
+    :param vector: Vector to represent this Symbol.  Unless it is already
+        read-only the vector is copied, so later changes to it will not
+        affect the Symbol.
     """
+    __slots__ = ( "parent", "_label", "_vector", "_spectrum" )
+
+    # Whether the Symbol type modifies the vector it is given, in which
+    # case the spectrum of the vector can not be known in advance.
+    _transforms_vector = False
 
     def __init__( self, parent, label, vector ):
-        # Store the constants as the return values of functions
+        # Store the constants, the vector is held read-only
         self.parent = parent
-        self.label = lambda : label
-        self.vector = lambda : array( vector )
-        self.dimensionality = lambda : self.vector().size
+        self._label = as_label( label )
+        self._vector = _read_only( vector, parent.dtype )
+
+        # The spectrum is computed when first required
+        self._spectrum = None
     
+    @classmethod
+    def _adopt( cls, parent, label, vector ):
+        """Make a Symbol of this class which holds the given read-only
+        vector as it is, without copying or modifying it."""
+        s = cls.__new__( cls )
+        s.parent = parent
+        s._label = as_label( label )
+        s._vector = vector
+        s._spectrum = None
+        return s
+
     def __str__( self ):
-        return self.label()
+        return str( self.label() )
+
+    def label( self ):
+        """:returns: The :class:`.Label` of this Symbol."""
+        return self._label
+
+    def vector( self ):
+        """:returns: The read-only vector representing this Symbol.  This is
+            not a copy, use :meth:`numpy.ndarray.copy` if a modifiable
+            vector is required."""
+        return self._vector
+
+    def dimensionality( self ):
+        """:returns: The dimensionality of this Symbol."""
+        return self._vector.size
+
+    def spectrum( self ):
+        """
+        :returns: The Fourier spectrum of the vector representing this
+            Symbol, see :func:`utils.vec_spectrum`.  The spectrum is
+            computed on first use and kept, so repeated binding with the same
+            Symbol only transforms it once.
+        """
+        if self._spectrum is None:
+            self._spectrum = vec_spectrum( self.vector(),
+                                           backend = self.parent.fft )
+        return self._spectrum
+
+    def _from_spectrum( self, label, spectrum ):
+        """Make a new Symbol of this type with the given label from the
+        spectrum of its vector, keeping the spectrum for later use."""
+        # The imaginary parts of the constant and Nyquist terms are lost
+        # when converting back to a real vector.
+        spectrum[0] = spectrum[0].real
+        if self.dimensionality() % 2 == 0:
+            spectrum[-1] = spectrum[-1].real
+
+        v_ = vec_from_spectrum( spectrum, self.dimensionality(),
+                                backend = self.parent.fft )
+        return self.parent._result( label, v_, spectrum )
     
     def inverse( self ):
         """
@@ -146,13 +534,29 @@ class Symbol( object ):
             unbinding operations.
 
         """
+        if self.parent.lazy:
+            return self.parent._defer( "inverse", ( self, ) )
+
+        # Return the inverse made earlier, if it is cached
+        cache = self.parent.cache
+        if cache is not None:
+            key = ( "inverse", id( self ) )
+            s = cache.get( key )
+            if s is not None:
+                return s
+
         # Create the inverse vector
         v = hstack( [ self.vector()[0], self.vector()[-1:0:-1] ] )
 
-        # Create a new Symbol of this type with label' and the vector
-        return self.parent.make_symbol( "%s'" % self, v )
+        # Create a new Symbol of this type with label' and the vector, the
+        # spectrum of the inverse is the conjugate of this spectrum.
+        f = None if self._spectrum is None else conj( self._spectrum )
+        s = self.parent._result( OpLabel( "inverse", ( self._label, ) ), v, f )
+
+        if cache is not None:
+            cache.put( key, s, ( self, ) )
+        return s
     
-    @parent_match
     def bind( self, other ):
         """Bind two Symbols of equivalent type and dimensionality.
     
@@ -162,16 +566,32 @@ class Symbol( object ):
         :returns: A Symbol representing the binding of this Symbol with another.
             The label of the returned Symbol will indicate this relationship.
         """
+        if other.parent is not self.parent:
+            _parent_mismatch()
+
+        if self.parent.lazy:
+            return self.parent._defer( "bind", ( self, other ) )
+
+        # Return the result made earlier, if it is cached
+        cache = self.parent.cache
+        if cache is not None:
+            key = ( "bind", id( self ), id( other ) )
+            s = cache.get( key )
+            if s is not None:
+                return s
+
         # Combine the labels
-        l_ = "( %s (*) %s )" % (self, other)
+        l_ = OpLabel( "bind", ( self._label, other._label ) )
 
-        # Combine the vectors
-        v_ = vec_convolve_circular( self.vector(), other.vector() )
+        # Combine the vectors by multiplying their spectra
+        f_ = self.spectrum() * other.spectrum()
 
         # Create and return a new Symbol
-        return self.parent.make_symbol( l_, v_ )
+        s = self._from_spectrum( l_, f_ )
+        if cache is not None:
+            cache.put( key, s, ( self, other ) )
+        return s
     
-    @parent_match
     def unbind( self, other ):
         """Unbind two Symbols of equivalent type and dimensionality.
             
@@ -182,9 +602,48 @@ class Symbol( object ):
             Symbol.
         :rtype: :class:`.Symbol`
         """
-        return self.bind( other.inverse() )
+        if other.parent is not self.parent:
+            _parent_mismatch()
+
+        if self.parent.lazy:
+            return self.parent._defer( "unbind", ( self, other ) )
+
+        # Return the result made earlier, if it is cached
+        cache = self.parent.cache
+        if cache is not None:
+            key = ( "unbind", id( self ), id( other ) )
+            s = cache.get( key )
+            if s is not None:
+                return s
+
+        # Combine the labels as for binding with the inverse of other
+        l_ = OpLabel( "unbind", ( self._label, other._label ) )
+
+        # The inverse of other has the conjugate spectrum
+        f_ = self.spectrum() * conj( other.spectrum() )
+
+        # Create and return a new Symbol
+        s = self._from_spectrum( l_, f_ )
+        if cache is not None:
+            cache.put( key, s, ( self, other ) )
+        return s
     
-    @parent_match
+    def bind_many( self, others ):
+        """Bind this Symbol with each of a list of Symbols, see
+        :meth:`.SymbolFactory.bind_many`.
+
+        :returns: The list of Symbols `self (*) others[i]`.
+        """
+        return self.parent.bind_many( self, others )
+
+    def unbind_many( self, others ):
+        """Unbind each of a list of Symbols from this Symbol, see
+        :meth:`.SymbolFactory.unbind_many`.
+
+        :returns: The list of Symbols `self (*) others[i]'`.
+        """
+        return self.parent.unbind_many( self, others )
+
     def compose( self, other ):
         """Compose this Symbol with another.
     
@@ -194,14 +653,24 @@ class Symbol( object ):
         :returns: The additive composition of this Symbol and another.
         :rtype: :class:`.Symbol`
         """
+        if other.parent is not self.parent:
+            _parent_mismatch()
+
+        if self.parent.lazy:
+            return self.parent._defer( "compose", ( self, other ) )
+
         # Combine the labels
-        l_ = "( %s + %s )" % ( self, other )
+        l_ = OpLabel( "compose", ( self._label, other._label ) )
 
         # Combine the vectors
         v_ = self.vector() + other.vector()
 
-        # Create and return a new Symbol
-        return self.parent.make_symbol( l_, v_ )
+        # Create and return a new Symbol, the spectrum of which is the sum
+        # of the spectra if they are already known.
+        f_ = None
+        if self._spectrum is not None and other._spectrum is not None:
+            f_ = self._spectrum + other._spectrum
+        return self.parent._result( l_, v_, f_ )
     
     def scale( self, scale ):
         """Return the current Symbol scaled by some factor.
@@ -215,14 +684,18 @@ class Symbol( object ):
         if not isinstance( scale, numbers.Number ):
             raise ValueError( "You may only scale a Symbol by a Number." )
 
+        if self.parent.lazy:
+            return self.parent._defer( "scale", ( self, ), scale )
+
         # Create the new label
-        l_ = "( %.3f %s )" % ( scale, self )
+        l_ = OpLabel( "scale", ( self._label, ), scale )
 
         # Generate the new vector
         v_ = scale * self.vector()
 
         # Create and return a new Symbol
-        return self.parent.make_symbol( l_, v_ )
+        f_ = None if self._spectrum is None else scale * self._spectrum
+        return self.parent._result( l_, v_, f_ )
     
     def exponentiate( self, n ):
         """Return the current Symbol raised to the power of `n1`.
@@ -236,16 +709,29 @@ class Symbol( object ):
         if not isinstance( n, numbers.Number ):
             raise ValueError("You may only scale a exponentiate by a Number.")
 
+        if self.parent.lazy:
+            return self.parent._defer( "exponentiate", ( self, ), n )
+
+        # Return the result made earlier, if it is cached
+        cache = self.parent.cache
+        if cache is not None:
+            key = ( "exponentiate", id( self ), n )
+            s = cache.get( key )
+            if s is not None:
+                return s
+
         # Create the new label
-        l_ = "( %s^{%.3f} )" % ( self, n )
+        l_ = OpLabel( "exponentiate", ( self._label, ), n )
 
-        # Generate the new vector
-        v_ = vec_exponentiate( self.vector(), n )
+        # Generate the new spectrum
+        f_ = self.spectrum() ** n
 
         # Create and return a new Symbol
-        return self.parent.make_symbol( l_, v_ )
+        s = self._from_spectrum( l_, f_ )
+        if cache is not None:
+            cache.put( key, s, ( self, ) )
+        return s
     
-    @parent_match
     def compare( self, other ):
         """Compare this Symbol with another.
     
@@ -255,6 +741,9 @@ class Symbol( object ):
         :returns: The cosine of the angle between this Symbol and the other.
         :rtype: float
         """
+        if other.parent is not self.parent:
+            _parent_mismatch()
+
         return vec_cosine( self.vector(), other.vector() )
     
     def magnitude( self ):
@@ -277,14 +766,38 @@ class SaturatingSymbol( Symbol ):
     :param vector: Vector to represent this Symbol.
     :param saturation: Function which is applied to saturate the
         representing vector, must accept and return a vector.
-        The default is :meth:`utils.saturation_sigmoid`
-    :type saturation: function
+        The default is the class attribute :attr:`saturation`.
+    :type saturation: :class:`.Saturation` or function
+
+    Every result of an operation on SaturatingSymbols is saturated.  To
+    saturate only the results which are observed use a lazy
+    :class:`.SymbolFactory`, see :mod:`.Expression`.  To use another
+    saturation for all Symbols, including those generated in batches,
+    derive a class::
+
+        class FastSaturatingSymbol( SaturatingSymbol ):
+            saturation = LookupTable()
 
     """
 
-    def __init__(self, parent, label, vector, saturation=saturation_sigmoid):
-        # Saturate the input vector
-        vector = saturation( vector )
+    __slots__ = ()
+    _transforms_vector = True
+
+    # The saturation applied to Symbols of this class
+    saturation = Sigmoid()
+
+    def __init__( self, parent, label, vector, saturation = None ):
+        if saturation is None:
+            saturation = self.saturation
+
+        # Saturate the input vector into a new buffer, which need not then
+        # be copied to be held read-only.
+        vector = asarray( vector, dtype = parent.dtype )
+        if isinstance( saturation, Saturation ):
+            vector = saturation( vector, out = empty_like( vector ) )
+        else:
+            vector = array( saturation( vector ), dtype = parent.dtype )
+        vector.flags.writeable = False
 
         # Now act as normal by calling super init
         super( SaturatingSymbol, self ).__init__( parent, label, vector )
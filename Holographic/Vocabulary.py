@@ -0,0 +1,105 @@
+# Python Holographic Reduced Representation Library
+# -------------------------------------------------
+# (C) Copyright Andrew Mundy 2013
+"""
+.. module:: Vocabulary
+   :synopsis: Collections of Symbols held as a single array.
+"""
+from .Symbol import _read_only
+
+class Vocabulary( object ):
+    """A collection of labelled Symbols whose vectors are the rows of a
+    single read-only (N, D) array.
+
+    Vocabularies are normally made with :meth:`.SymbolFactory.new_symbols`,
+    which generates all of the vectors at once::
+
+        words = factory.new_symbols( [ "dog", "cat", "mouse" ] )
+        dog = words["dog"]
+
+    The Symbols of a vocabulary are views of the rows of :attr:`vectors`,
+    and are only made when first looked up.  If the factory makes Symbols
+    which modify their vectors (e.g. :class:`.SaturatingSymbol`) the rows
+    hold the modified vectors.
+
+    :param factory: The :class:`.SymbolFactory` the Symbols belong to.
+    :type factory: :class:`.SymbolFactory`
+    :param labels: The distinct labels of the Symbols, in order.
+    :param vectors: (N, D) array with a row for each label.  This is
+        copied unless it is already read-only and of the factory's dtype.
+    :param transformed: True if the vectors have already been modified by
+        the factory's Symbol type, e.g. when loaded from a store, and should
+        be used as they are.
+    :type transformed: bool
+    :param distinct: If False the labels may be repeated, as those of the
+        rows of a :class:`.CleanUpMemory` may be, and a label finds the last
+        Symbol with it.
+    :type distinct: bool
+
+    :throws ValueError: The labels are not distinct, or the vectors are of
+        the wrong shape.
+    """
+
+    def __init__( self, factory, labels, vectors, transformed = False,
+                  distinct = True ):
+        labels = list( labels )
+        vectors = _read_only( vectors, factory.dtype )
+        if not vectors.shape == ( len( labels ), factory.dimensionality() ):
+            raise ValueError( "A Vocabulary needs a vector of dimensionality "
+                              "%d for each label." % factory.dimensionality() )
+
+        self.factory = factory
+        self.labels = labels
+        self._indices = dict( ( l, i ) for ( i, l ) in enumerate( labels ) )
+        if distinct and not len( self._indices ) == len( labels ):
+            raise ValueError( "The labels of a Vocabulary must be distinct." )
+
+        # The vectors are held read-only so that the rows may be shared with
+        # the Symbols rather than copied.
+        self.vectors = vectors
+        self._symbols = [ None ] * len( labels )
+
+        # If the Symbols modify their vectors they can not be made from the
+        # rows by the factory.  Instead the rows hold the modified vectors
+        # and the Symbols are made to hold them as they are.
+        self._adopt = None
+        if len( labels ) > 0 and self._make( 0 )._transforms_vector:
+            self._adopt = type( self._symbols[0] )._adopt
+            if not transformed:
+                self.vectors = factory._transform_rows( labels, vectors )
+                self.vectors.flags.writeable = False
+            self._symbols[0] = None
+
+    def _make( self, i ):
+        """Return the Symbol for row i, making it if required."""
+        if self._symbols[i] is None:
+            if self._adopt is not None:
+                self._symbols[i] = self._adopt( self.factory, self.labels[i],
+                                                self.vectors[i] )
+            else:
+                self._symbols[i] = self.factory.make_symbol(
+                    self.labels[i], self.vectors[i] )
+        return self._symbols[i]
+
+    def __len__( self ):
+        return len( self.labels )
+
+    def __iter__( self ):
+        for i in range( len( self.labels ) ):
+            yield self._make( i )
+
+    def __contains__( self, label ):
+        return label in self._indices
+
+    def __getitem__( self, label ):
+        """Return the Symbol with the given label."""
+        return self._make( self._indices[label] )
+
+    def index( self, label ):
+        """Return the row of :attr:`vectors` representing the Symbol with
+        the given label."""
+        return self._indices[label]
+
+    def symbol( self, i ):
+        """Return the Symbol represented by row i of :attr:`vectors`."""
+        return self._make( i )
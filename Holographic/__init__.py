@@ -3,11 +3,40 @@
 .. moduleauthor:: Andrew Mundy <mundya@cs.manchester.ac.uk>
 
 Provides a useful set of tools for experimenting with ideas using HRRS,
-particularly where you don't want to go to the lengths of building a 
+particularly where you don't want to go to the lengths of building a
 nengo example.
+
+Submodules, and the names below, are imported when first used, so that
+`import Holographic` does not import numpy until it is needed.
 """
+import importlib
+
+# The submodules of the package
+_MODULES = frozenset( [ "AsyncMemory", "Cache", "Encoding", "Expression",
+                        "FFT", "Index", "Instrumentation", "Label", "Memory",
+                        "Pipeline", "Saturation", "Sharded", "Similarity",
+                        "Storage", "Superposition", "Symbol", "Vocabulary",
+                        "utils" ] )
+
+# The names provided by the package, and the submodules they are found in
+_NAMES = { "vec_generate" : "utils",
+           "vec_convolve_circular" : "utils",
+           "vec_exponentiate" : "utils",
+           "vec_magnitude" : "utils",
+           "SymbolFactory" : "Symbol",
+           "CleanUpMemory" : "Memory" }
+
+__all__ = sorted( _MODULES | set( _NAMES ) )
+
+def __getattr__( name ):
+    if name in _MODULES:
+        return importlib.import_module( "." + name, __name__ )
+    if name in _NAMES:
+        value = getattr( importlib.import_module( "." + _NAMES[name],
+                                                  __name__ ), name )
+        globals()[name] = value
+        return value
+    raise AttributeError( "module %r has no attribute %r" % ( __name__, name ) )
 
-import Memory
-import Symbol
-from utils import ( vec_generate, vec_convolve_circular, vec_exponentiate,
-                    vec_magnitude )
+def __dir__():
+    return sorted( set( globals() ) | set( __all__ ) )
@@ -2,16 +2,64 @@
 # -------------------------------------------------
 # (C) Copyright Andrew Mundy 2013
 
-from numpy import *
+import hashlib
 import numbers
 
-def vec_generate( d ):
+from numpy import ( argpartition, argsort, asarray, conj, empty, exp,
+                    float32, floating, iinfo, issubdtype, ndarray, newaxis,
+                    ones, random, result_type, rint, sqrt, take_along_axis )
+
+from . import FFT
+
+def vec_generate( d, n = None, rng = None ):
     """Generates a vector of dimensionality d, with elements selected from
-    a normal distribution with mean 0 and variance 1/d."""
-    return random.normal( 0, sqrt(1./d), size=(d) )
+    a normal distribution with mean 0 and variance 1/d.  If n is given a
+    (n, d) array of n such vectors is generated.  Values are drawn from the
+    numpy Generator rng if given, or the global numpy random state."""
+    rng = random if rng is None else rng
+    return rng.normal( 0, sqrt(1./d), size=(d if n is None else (n, d)) )
+
+def rng_for_label( seed, label ):
+    """Return a numpy Generator determined only by the integer seed and the
+    label.  The label is hashed with SHA-256, rather than `hash()`, so that
+    the same Generator is returned in every process."""
+    digest = hashlib.sha256( ( u"%s" % label ).encode( "utf-8" ) ).hexdigest()
+    return random.default_rng( [ seed, int( digest, 16 ) ] )
+
+def vec_generate_labelled( d, labels, seed, generator = vec_generate ):
+    """Generate a (len( labels ), d) array of vectors, each of which is
+    determined only by the seed and its label.  The same vectors are
+    therefore generated in any process, and in any order, and large
+    numbers of labels may be split between processes.
+
+    :param generator: Function used to generate each vector, it is passed
+        the dimensionality and a Generator as the keyword argument `rng`.
+    """
+    vectors = empty( ( len( labels ), d ) )
+    for ( i, label ) in enumerate( labels ):
+        vectors[i] = generator( d, rng = rng_for_label( seed, label ) )
+    return vectors
+
+def vec_spectrum( a, out = None, backend = None ):
+    """Return the Fourier spectrum of the real vector a.  As a is real only
+    the d/2 + 1 non-negative frequency terms are returned.  If a is a
+    stack of vectors the spectrum of each is found.
+
+    :param out: Optional complex array to write the spectrum into.
+    :param backend: The :class:`.FFTBackend` to use, by default that set
+        with :func:`FFT.set_backend`.
+    """
+    return FFT.get_backend( backend ).rfft( a, out )
+
+def vec_from_spectrum( f, d, out = None, backend = None ):
+    """Return the real vector of dimensionality d with the spectrum f, or
+    the stack of vectors if f is a stack of spectra.  out and backend are
+    as for :func:`vec_spectrum`."""
+    return FFT.get_backend( backend ).irfft( f, d, out )
 
-def vec_convolve_circular( a, b ):
-    """Convolve two vectors and return the result."""
+def vec_convolve_circular( a, b, backend = None ):
+    """Convolve two vectors and return the result, transforming them with
+    the given :class:`.FFTBackend` or the default."""
     # Check that the vectors conform
     assert isinstance( a, ndarray ) and isinstance( b, ndarray )
     if not a.size == b.size:
@@ -19,34 +67,119 @@ def vec_convolve_circular( a, b ):
 
     # Transform into the Fourier/frequency domain and perform
     # element-wise multiplication.
-    fft_a = fft.fft( a )
-    fft_b = fft.fft( b )
-    fft_c = fft_a * fft_b
+    f_c = vec_spectrum( a, backend = backend ) * \
+          vec_spectrum( b, backend = backend )
 
     # Now convert back from the Fourier domain
-    return real( fft.ifft( fft_c ) )
+    return vec_from_spectrum( f_c, a.size, backend = backend )
+
+def vec_correlate_circular( a, b, backend = None ):
+    """Correlate two vectors, convolving a with the approximate inverse of
+    b, and return the result."""
+    assert isinstance( a, ndarray ) and isinstance( b, ndarray )
+    if not a.size == b.size:
+        raise ValueError( "Vectors must be of the same dimensionality." )
+
+    # The approximate inverse of b has the conjugate spectrum of b
+    f_c = vec_spectrum( a, backend = backend ) * \
+          conj( vec_spectrum( b, backend = backend ) )
+    return vec_from_spectrum( f_c, a.size, backend = backend )
+
+def vec_convolve_circular_many( a, b, backend = None ):
+    """Convolve stacks of vectors and return the stack of results.
+
+    The vectors lie along the last axis and the leading axes broadcast, so
+    a (D,) vector may be convolved with each row of a (N, D) array, or two
+    (N, D) arrays convolved row by row.  All of the transforms are performed
+    in a single vectorised pass.
+    """
+    a = asarray( a )
+    b = asarray( b )
+    if not a.shape[-1] == b.shape[-1]:
+        raise ValueError( "Vectors must be of the same dimensionality." )
 
-def vec_exponentiate( a, n ):
+    f_c = vec_spectrum( a, backend = backend ) * \
+          vec_spectrum( b, backend = backend )
+    return vec_from_spectrum( f_c, a.shape[-1], backend = backend )
+
+def vec_correlate_circular_many( a, b, backend = None ):
+    """Correlate stacks of vectors, convolving those of a with the
+    approximate inverses of those of b, and return the stack of results.
+    The stacks broadcast as for :func:`vec_convolve_circular_many`."""
+    a = asarray( a )
+    b = asarray( b )
+    if not a.shape[-1] == b.shape[-1]:
+        raise ValueError( "Vectors must be of the same dimensionality." )
+
+    f_c = vec_spectrum( a, backend = backend ) * \
+          conj( vec_spectrum( b, backend = backend ) )
+    return vec_from_spectrum( f_c, a.shape[-1], backend = backend )
+
+def vec_exponentiate( a, n, backend = None ):
     """Raise vector a to the power of n."""
     assert isinstance( a, ndarray ) and isinstance( n, numbers.Number )
 
-    # Transform into the Fourier/frequency domain and perform
-    # element-wise multiplication.
-    fft_a = fft.fft( a )
-    fft_b = fft_a ** n
+    # Transform into the Fourier/frequency domain and raise each
+    # component to the power.
+    f_b = vec_spectrum( a, backend = backend ) ** n
 
     # Now convert back from the Fourier domain
-    return real( fft.ifft( fft_b ) )
+    return vec_from_spectrum( f_b, a.size, backend = backend )
 
 def vec_magnitude( a ):
     """Return the magnitude of vector a."""
     assert isinstance( a, ndarray )
-    return sqrt( sum( a**2 ) )
+    return sqrt( ( a**2 ).sum() )
 
 def vec_dot_product( a, b ):
     """The dot product of two vectors."""
     assert isinstance( a, ndarray ) and isinstance( b, ndarray )
-    return sum( a * b )
+    return ( a * b ).sum()
+
+def vec_normalise( a ):
+    """Return a scaled to unit magnitude along its last axis.  A (N, D)
+    array has each of its rows normalised; zero vectors are left as zero."""
+    assert isinstance( a, ndarray )
+    magnitudes = sqrt( ( a**2 ).sum( axis=-1, keepdims=True ) )
+    magnitudes[magnitudes == 0.] = 1.
+    return a / magnitudes
+
+def vec_quantise( a, dtype ):
+    """Return the rows of a (N, D) array as codes of the given type, and
+    the factor by which to scale each row of codes to approximate a.
+
+    Floating point types are simply converted and have unit scales.  For
+    integer types each row is scaled so that its largest magnitude
+    component maps to the largest code.
+    """
+    assert isinstance( a, ndarray )
+    dtype = result_type( dtype )
+    if issubdtype( dtype, floating ):
+        return ( a.astype( dtype ), ones( a.shape[0], dtype = float32 ) )
+
+    largest = abs( a ).max( axis=-1 )
+    scales = ( largest / iinfo( dtype ).max ).astype( float32 )
+    scales[scales == 0.] = 1.
+    codes = rint( a / scales[:, newaxis] ).astype( dtype )
+    return ( codes, scales )
+
+def vec_top_k( a, k ):
+    """Return the indices of the k largest values along the last axis of a,
+    ordered from largest to smallest.
+
+    Uses a partial sort so that selecting a few values from a long array
+    costs O(N) rather than O(N log N).
+    """
+    assert isinstance( a, ndarray )
+    n = a.shape[-1]
+    if k >= n:
+        return argsort( -a, axis=-1, kind='stable' )
+
+    # Partition out the k largest values and then sort only those
+    top = argpartition( -a, k - 1, axis=-1 )[..., :k]
+    order = argsort( -take_along_axis( a, top, axis=-1 ), axis=-1,
+                     kind='stable' )
+    return take_along_axis( top, order, axis=-1 )
 
 def vec_cosine( a, b ):
     """Return the cosine of the angle between the vectors."""
@@ -65,4 +198,4 @@ def saturation_sigmoid( x ):
     :returns: The effect of saturating the input value.
     :rtype: float
     """
-    return 2.4/( 1 + e ** (-1.75*x) ) - 1.2
+    return 2.4/( 1 + exp( -1.75*x ) ) - 1.2
@@ -0,0 +1,87 @@
+"""Compare the FFT backends across dimensionalities and batch sizes.
+
+Times a forward and inverse real transform of a batch of (N, D) vectors
+with each backend installed, both allocating new results and writing into
+buffers which are reused, and reports the best time of each per vector.
+
+    python benchmarks/bench_fft.py -d 512 4096 -b 1 64 --workers 4
+"""
+from __future__ import print_function, division
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic import FFT
+
+def _backends( args ):
+    """Return the backends to compare, as ( name, backend ) pairs."""
+    backends = [ ( "numpy", FFT.NumpyFFT() ) ]
+    try:
+        backends.append( ( "scipy", FFT.ScipyFFT() ) )
+        if args.workers > 1:
+            backends.append( ( "scipy workers=%d" % args.workers,
+                               FFT.ScipyFFT( workers = args.workers ) ) )
+    except ImportError:
+        print( "scipy is not installed" )
+    try:
+        backends.append( ( "pyfftw", FFT.FFTWFFT( effort = args.effort ) ) )
+        if args.workers > 1:
+            backends.append( ( "pyfftw threads=%d" % args.workers,
+                               FFT.FFTWFFT( threads = args.workers,
+                                            effort = args.effort ) ) )
+    except ImportError:
+        print( "pyfftw is not installed" )
+    return backends
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-d", "--dimensionality", type = int, nargs = "+",
+                         default = [ 64, 512, 4096, 16384 ] )
+    parser.add_argument( "-b", "--batch", type = int, nargs = "+",
+                         default = [ 1, 64 ] )
+    parser.add_argument( "-r", "--repeat", type = int, default = 5 )
+    parser.add_argument( "--workers", type = int, default = 4,
+                         help = "threads used by the multithreaded backends" )
+    parser.add_argument( "--effort", default = "FFTW_MEASURE",
+                         help = "pyFFTW planning flag" )
+    parser.add_argument( "--dtype", default = "float64" )
+    args = parser.parse_args()
+
+    backends = _backends( args )
+    rng = numpy.random.default_rng( 0 )
+
+    print( "%-22s %6s %6s %14s %14s" % ( "backend", "D", "batch",
+           "alloc (us)", "out= (us)" ) )
+    for d in args.dimensionality:
+        for n in args.batch:
+            x = rng.normal( 0, 1, ( n, d ) ).astype( args.dtype )
+            f = numpy.fft.rfft( x, axis = -1 )
+            ( f_out, x_out ) = ( numpy.empty_like( f ), numpy.empty_like( x ) )
+            number = max( 1, 20000 // ( n * d ) )
+
+            for ( name, backend ) in backends:
+                def alloc():
+                    backend.irfft( backend.rfft( x ), d )
+
+                def reuse():
+                    backend.irfft( backend.rfft( x, f_out ), d, x_out )
+
+                # Plan, and check, before timing
+                reuse()
+                if not numpy.allclose( x_out, x, atol = 1e-4 ):
+                    print( "%-22s %6d %6d  wrong result" % ( name, d, n ) )
+                    continue
+
+                times = [ min( timeit.Timer( call ).repeat( args.repeat,
+                                                            number ) )
+                          / ( number * n ) for call in ( alloc, reuse ) ]
+                print( "%-22s %6d %6d %14.2f %14.2f" % ( name, d, n,
+                       1e6 * times[0], 1e6 * times[1] ) )
+
+if __name__ == "__main__":
+    main()
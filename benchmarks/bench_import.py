@@ -0,0 +1,53 @@
+"""Measure the cold-start cost of importing the library.
+
+Each statement is timed in a new interpreter, so that nothing has been
+imported before it, and the median time of the repeats is reported with
+the number of modules the statement imported.  numpy alone is timed as
+a baseline.
+
+    python benchmarks/bench_import.py -r 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [ "import numpy",
+               "import Holographic",
+               "from Holographic import SymbolFactory",
+               "import Holographic.Memory",
+               "import Holographic.Instrumentation" ]
+
+# Run in the new interpreter; prints the seconds taken and modules imported
+_PROBE = """
+import sys, time
+before = len( sys.modules )
+start = time.perf_counter()
+%s
+print( time.perf_counter() - start, len( sys.modules ) - before )
+"""
+
+def measure( statement ):
+    """Return the seconds taken by, and modules imported by, a statement in
+    a new interpreter."""
+    root = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), ".." )
+    output = subprocess.check_output( [ sys.executable, "-c",
+                                        _PROBE % statement ], cwd = root )
+    ( seconds, modules ) = output.split()
+    return ( float( seconds ), int( modules ) )
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-r", "--repeat", type = int, default = 10 )
+    parser.add_argument( "statements", nargs = "*", default = STATEMENTS )
+    args = parser.parse_args()
+
+    print( "%-40s %10s %8s" % ( "statement", "ms", "modules" ) )
+    for statement in args.statements:
+        runs = [ measure( statement ) for _ in range( args.repeat ) ]
+        print( "%-40s %10.2f %8d" % ( statement,
+               1e3 * statistics.median( r[0] for r in runs ), runs[-1][1] ) )
+
+if __name__ == "__main__":
+    main()
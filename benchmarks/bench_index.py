@@ -0,0 +1,99 @@
+"""Compare approximate CleanUpMemory indices against the exact scan.
+
+Fills a memory with random symbols, then cleans noisy copies of some of
+them.  For each index configuration the build time, the mean query latency
+and the recall@k against the exact scan are reported.
+
+    python benchmarks/bench_index.py -n 100000 -d 512 -k 10
+"""
+from __future__ import print_function, division
+
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.Memory import CleanUpMemory
+from Holographic.Index import HyperplaneIndex, IVFIndex
+from Holographic.utils import vec_generate
+
+def noisy_copies( factory, symbols, similarity, rng ):
+    """Return copies of symbols with noise added so that their expected
+    cosine similarity to the originals is the given value."""
+    scale = numpy.sqrt( 1. / similarity ** 2 - 1. )
+    return [ factory.make_symbol( "~%s" % s, s.vector() + scale *
+                 rng.normal( 0, s.magnitude() / numpy.sqrt( s.vector().size ),
+                             s.vector().size ) )
+             for s in symbols ]
+
+def build( factory, symbols, index ):
+    start = time.time()
+    memory = CleanUpMemory( factory, index )
+    for s in symbols:
+        memory.add_symbol( s )
+    return memory, time.time() - start
+
+def query( memory, queries, k ):
+    start = time.time()
+    results = [ [ s for ( c, s ) in memory.clean( q, k ) ] for q in queries ]
+    return results, ( time.time() - start ) / len( queries )
+
+def recall( exact, approximate, k ):
+    found = [ len( set( map( id, e[:k] ) ) & set( map( id, a[:k] ) ) ) / k
+              for ( e, a ) in zip( exact, approximate ) ]
+    return sum( found ) / len( found )
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-n", "--symbols", type = int, default = 100000 )
+    parser.add_argument( "-d", "--dimensionality", type = int, default = 512 )
+    parser.add_argument( "-k", type = int, default = 10 )
+    parser.add_argument( "-q", "--queries", type = int, default = 200 )
+    parser.add_argument( "-s", "--similarity", type = float, default = 0.7,
+                         help = "expected cosine of queries to their targets" )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    numpy.random.seed( args.seed )
+    rng = numpy.random.RandomState( args.seed )
+    factory = SymbolFactory( args.dimensionality, vec_generate, Symbol )
+    symbols = [ factory.new_symbol( "s%d" % i ) for i in range( args.symbols ) ]
+    targets = rng.choice( args.symbols, args.queries, replace = False )
+    queries = noisy_copies( factory, [ symbols[i] for i in targets ],
+                            args.similarity, rng )
+
+    memory, build_time = build( factory, symbols, None )
+    exact, exact_time = query( memory, queries, args.k )
+
+    print( "N = %d, D = %d, k = %d, query similarity %.2f" % (
+           args.symbols, args.dimensionality, args.k, args.similarity ) )
+    print( "%-36s %9s %10s %9s %9s" % ( "index", "build (s)", "query (ms)",
+                                        "recall@1", "recall@k" ) )
+    print( "%-36s %9.2f %10.3f %9.3f %9.3f" % ( "exact", build_time,
+                                                1e3 * exact_time, 1., 1. ) )
+
+    n_lists = int( 4 * numpy.sqrt( args.symbols ) )
+    n_bits = int( numpy.log2( args.symbols ) ) - 4
+    configurations = []
+    for n_probes in ( 1, 8, 32 ):
+        configurations.append( (
+            "HyperplaneIndex(bits=%d, probes=%d)" % ( n_bits, n_probes ),
+            HyperplaneIndex( n_bits, 8, n_probes, seed = args.seed ) ) )
+    for n_probe in ( 4, 16, 64 ):
+        configurations.append( (
+            "IVFIndex(lists=%d, probe=%d)" % ( n_lists, n_probe ),
+            IVFIndex( n_lists, n_probe, seed = args.seed ) ) )
+
+    for ( name, index ) in configurations:
+        memory, build_time = build( factory, symbols, index )
+        results, query_time = query( memory, queries, args.k )
+        print( "%-36s %9.2f %10.3f %9.3f %9.3f" % ( name, build_time,
+               1e3 * query_time, recall( exact, results, 1 ),
+               recall( exact, results, args.k ) ) )
+
+if __name__ == "__main__":
+    main()
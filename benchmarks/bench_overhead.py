@@ -0,0 +1,58 @@
+"""Measure the time taken by each Symbol operation at small dimensionality,
+where the cost of making the resulting Symbol dominates.
+
+Each operation is timed on a factory in debug mode, in which every result
+is checked and copied as it is by make_symbol, and on a default factory,
+in which results are trusted and adopted by the new Symbol.  Both are
+modes of the current code, so the ratio is the cost of checking results
+against trusting them, not a comparison with earlier versions.
+
+    python benchmarks/bench_overhead.py -d 8 32 128
+"""
+from __future__ import print_function, division
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.utils import vec_generate
+
+OPERATIONS = [ ( "bind", lambda a, b: a.bind( b ) ),
+               ( "unbind", lambda a, b: a.unbind( b ) ),
+               ( "inverse", lambda a, b: a.inverse() ),
+               ( "compose", lambda a, b: a.compose( b ) ),
+               ( "scale", lambda a, b: a.scale( 0.5 ) ),
+               ( "exponentiate", lambda a, b: a.exponentiate( 2 ) ) ]
+
+def time_operation( factory, operation, repeat ):
+    """Return the best time, in microseconds, of one operation."""
+    ( a, b ) = ( factory.new_symbol( "a" ), factory.new_symbol( "b" ) )
+    ( a.spectrum(), b.spectrum() )
+    timer = timeit.Timer( lambda: operation( a, b ) )
+    return 1e6 * min( timer.repeat( 5, repeat ) ) / repeat
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-d", "--dimensionality", type = int, nargs = "+",
+                         default = [ 8, 32, 128 ] )
+    parser.add_argument( "-r", "--repeat", type = int, default = 2000 )
+    args = parser.parse_args()
+
+    print( "%6s %-14s %12s %12s %14s" % ( "D", "operation", "debug (us)",
+                                          "trusted (us)", "debug/trusted" ) )
+    for d in args.dimensionality:
+        debug = SymbolFactory( d, vec_generate, Symbol, seed = 0,
+                               debug = True )
+        trusted = SymbolFactory( d, vec_generate, Symbol, seed = 0 )
+        for ( name, operation ) in OPERATIONS:
+            checked = time_operation( debug, operation, args.repeat )
+            adopted = time_operation( trusted, operation, args.repeat )
+            print( "%6d %-14s %12.2f %12.2f %14.2f" % ( d, name, checked,
+                                                        adopted,
+                                                        checked / adopted ) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare the accuracy and throughput of reduced precision clean up.
+
+For each dimensionality and vocabulary size, fills memories of float64 and
+float32 symbols, and memories which scan float16 and int8 codes before
+rescoring in full precision, then cleans batches of noisy symbols.  The
+bytes scanned per query, the throughput and the recall@1 and recall@k
+against the float64 memory are reported.
+
+    python benchmarks/bench_precision.py -d 256 512 1024 -n 10000 100000
+"""
+from __future__ import print_function, division
+
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.Memory import CleanUpMemory
+from Holographic.utils import vec_generate
+
+# ( name, factory dtype, scan dtype )
+MODES = [ ( "float64", numpy.float64, None ),
+          ( "float32", numpy.float32, None ),
+          ( "float32 + float16 scan", numpy.float32, numpy.float16 ),
+          ( "float32 + int8 scan", numpy.float32, numpy.int8 ) ]
+
+def run( memory, queries, k, batch ):
+    """Return the results of cleaning the queries and the number of queries
+    cleaned per second."""
+    batches = [ queries[i:i + batch] for i in range( 0, len( queries ), batch ) ]
+    start = time.time()
+    results = []
+    for b in batches:
+        results.extend( memory.clean_batch( b, k ) )
+    return ( [ [ str( s ) for ( c, s ) in r ] for r in results ],
+             len( queries ) / ( time.time() - start ) )
+
+def recall( exact, approximate, k ):
+    found = [ len( set( e[:k] ) & set( a[:k] ) ) / k
+              for ( e, a ) in zip( exact, approximate ) ]
+    return sum( found ) / len( found )
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-d", "--dimensionality", type = int, nargs = "+",
+                         default = [ 256, 512, 1024 ] )
+    parser.add_argument( "-n", "--symbols", type = int, nargs = "+",
+                         default = [ 10000, 100000 ] )
+    parser.add_argument( "-k", type = int, default = 10 )
+    parser.add_argument( "-b", "--batch", type = int, default = 32 )
+    parser.add_argument( "-q", "--queries", type = int, default = 256 )
+    parser.add_argument( "-r", "--rescore", type = int, default = 64 )
+    parser.add_argument( "--noise", type = float, default = 1.,
+                         help = "magnitude of the noise added to queries, " \
+                                "relative to that of the symbols" )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    print( "k = %d, batch %d, rescore %d, noise %.2f" % (
+           args.k, args.batch, args.rescore, args.noise ) )
+    print( "%6s %8s %-24s %12s %12s %9s %9s" % (
+           "D", "N", "mode", "scan (MB)", "queries / s", "recall@1",
+           "recall@k" ) )
+
+    for d in args.dimensionality:
+        for n in args.symbols:
+            labels = [ "s%d" % i for i in range( n ) ]
+            noise = [ "n%d" % i for i in range( args.queries ) ]
+
+            exact = None
+            for ( name, dtype, scan_dtype ) in MODES:
+                factory = SymbolFactory( d, vec_generate, Symbol,
+                                         seed = args.seed, dtype = dtype )
+                memory = CleanUpMemory( factory, scan_dtype = scan_dtype,
+                                        rescore = args.rescore )
+                memory.add_vocabulary( factory.new_symbols( labels ) )
+
+                # The same queries for every mode, as the vectors are
+                # derived from the labels.
+                vocabulary = factory.new_symbols( noise )
+                queries = [ memory._symbol( i ).compose(
+                                vocabulary.symbol( i ).scale( args.noise ) )
+                            for i in range( args.queries ) ]
+
+                ( results, rate ) = run( memory, queries, args.k, args.batch )
+                if exact is None:
+                    exact = results
+
+                scanned = memory.vectors.nbytes if scan_dtype is None else \
+                          memory._state.codes[:n].nbytes
+                print( "%6d %8d %-24s %12.1f %12.1f %9.3f %9.3f" % (
+                       d, n, name, scanned / 2.**20, rate,
+                       recall( exact, results, 1 ),
+                       recall( exact, results, args.k ) ) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare the cost and accuracy of the saturation functions.
+
+Saturates a batch of (N, D) vectors with the original
+utils.saturation_sigmoid and with each Saturation object, in place, and
+reports the time taken, the largest error seen against the exact sigmoid
+and the error bound recorded by each function.
+
+    python benchmarks/bench_saturation.py -n 4096 -d 512
+"""
+from __future__ import print_function, division
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic.Saturation import Sigmoid, LookupTable, PiecewiseLinear
+from Holographic.utils import saturation_sigmoid
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-n", "--vectors", type = int, default = 4096 )
+    parser.add_argument( "-d", "--dimensionality", type = int, default = 512 )
+    parser.add_argument( "-r", "--repeat", type = int, default = 10 )
+    parser.add_argument( "--dtype", default = "float64" )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    rng = numpy.random.default_rng( args.seed )
+    x = rng.normal( 0, 1, ( args.vectors, args.dimensionality ) )
+    x = x.astype( args.dtype )
+    exact = saturation_sigmoid( x.astype( float ) )
+    out = numpy.empty_like( x )
+
+    functions = [
+        ( "utils.saturation_sigmoid", lambda: saturation_sigmoid( x ), None ),
+        ( "Sigmoid", None, Sigmoid() ),
+        ( "LookupTable(1024)", None, LookupTable() ),
+        ( "LookupTable(256)", None, LookupTable( size = 256 ) ),
+        ( "PiecewiseLinear", None, PiecewiseLinear() ),
+        ( "PiecewiseLinear(10)", None,
+          PiecewiseLinear( knots = ( 0., 0.5, 1., 1.6, 2.5, 4. ) ) ) ]
+
+    print( "%d x %d %s" % ( args.vectors, args.dimensionality, args.dtype ) )
+    print( "%-26s %10s %12s %12s" % ( "function", "time (ms)", "max error",
+                                      "bound" ) )
+    for ( name, call, saturation ) in functions:
+        if call is None:
+            call = lambda: saturation( x, out = out )
+        result = call()
+        time = min( timeit.Timer( call ).repeat( args.repeat, 1 ) )
+        bound = "-" if saturation is None else "%.3g" % saturation.max_error
+        print( "%-26s %10.2f %12.3g %12s" % ( name, 1e3 * time,
+               abs( result - exact ).max(), bound ) )
+
+if __name__ == "__main__":
+    main()
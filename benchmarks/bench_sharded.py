@@ -0,0 +1,69 @@
+"""Measure the query throughput of a ShardedCleanUpMemory against the
+number of workers.
+
+Fills a memory with random symbols and cleans batches of noisy copies of
+them, first with the CleanUpMemory itself and then sharded across pools of
+threads and processes of increasing size.
+
+    python benchmarks/bench_sharded.py -n 200000 -d 512 -b 64 -w 1 2 4 8
+"""
+from __future__ import print_function, division
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.Memory import CleanUpMemory
+from Holographic.Sharded import ShardedCleanUpMemory
+from Holographic.utils import vec_generate
+
+def throughput( memory, batches, k ):
+    """Return the number of queries cleaned per second."""
+    memory.clean_batch( batches[0], k )  # Warm up any pool
+    start = time.time()
+    for batch in batches:
+        memory.clean_batch( batch, k )
+    return sum( len( b ) for b in batches ) / ( time.time() - start )
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-n", "--symbols", type = int, default = 200000 )
+    parser.add_argument( "-d", "--dimensionality", type = int, default = 512 )
+    parser.add_argument( "-k", type = int, default = 10 )
+    parser.add_argument( "-b", "--batch", type = int, default = 64 )
+    parser.add_argument( "-q", "--queries", type = int, default = 512 )
+    parser.add_argument( "-w", "--workers", type = int, nargs = "+",
+                         default = [ 1, 2, 4 ] )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    factory = SymbolFactory( args.dimensionality, vec_generate, Symbol,
+                             seed = args.seed )
+    memory = CleanUpMemory( factory )
+    memory.add_vocabulary( factory.new_symbols(
+        [ "s%d" % i for i in range( args.symbols ) ] ) )
+
+    noise = factory.new_symbols( [ "n%d" % i for i in range( args.queries ) ] )
+    queries = [ memory._symbol( i ).compose( noise.symbol( i ) )
+                for i in range( args.queries ) ]
+    batches = [ queries[i:i + args.batch]
+                for i in range( 0, len( queries ), args.batch ) ]
+
+    print( "N = %d, D = %d, k = %d, batch %d" % (
+           args.symbols, args.dimensionality, args.k, args.batch ) )
+    print( "%-10s %8s %14s" % ( "executor", "workers", "queries / s" ) )
+    print( "%-10s %8s %14.1f" % ( "none", "-",
+                                  throughput( memory, batches, args.k ) ) )
+
+    for executor in ( "thread", "process" ):
+        for workers in args.workers:
+            with ShardedCleanUpMemory( memory, executor = executor,
+                                       workers = workers ) as sharded:
+                print( "%-10s %8d %14.1f" % ( executor, workers,
+                       throughput( sharded, batches, args.k ) ) )
+
+if __name__ == "__main__":
+    main()
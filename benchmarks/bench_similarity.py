@@ -0,0 +1,60 @@
+"""Measure the throughput of all-pairs similarity against the memory
+budget of each block.
+
+Compares a vocabulary of random symbols with itself, first a sample of
+pairs with Symbol.compare, then the whole Gram matrix a block at a time
+with each budget, reporting millions of cosines per second.
+
+    python benchmarks/bench_similarity.py -n 20000 -d 512 -m 16 64 256
+"""
+from __future__ import print_function, division
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.Similarity import blocks
+from Holographic.utils import vec_generate
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    parser.add_argument( "-n", "--symbols", type = int, default = 20000 )
+    parser.add_argument( "-d", "--dimensionality", type = int, default = 512 )
+    parser.add_argument( "-m", "--megabytes", type = int, nargs = "+",
+                         default = [ 4, 16, 64, 256 ] )
+    parser.add_argument( "--pairs", type = int, default = 2000,
+                         help = "pairs timed with Symbol.compare" )
+    parser.add_argument( "--dtype", default = "float32" )
+    parser.add_argument( "--seed", type = int, default = 0 )
+    args = parser.parse_args()
+
+    factory = SymbolFactory( args.dimensionality, vec_generate, Symbol,
+                             seed = args.seed, dtype = args.dtype )
+    vocabulary = factory.new_symbols(
+        [ "s%d" % i for i in range( args.symbols ) ] )
+
+    print( "N = %d, D = %d, %s" % ( args.symbols, args.dimensionality,
+                                    args.dtype ) )
+    print( "%-16s %16s" % ( "method", "Mcosines / s" ) )
+
+    symbols = [ vocabulary.symbol( i ) for i in range( 64 ) ]
+    start = time.time()
+    for i in range( args.pairs ):
+        symbols[i % 64].compare( symbols[( 7 * i + 1 ) % 64] )
+    print( "%-16s %16.3f" % ( "Symbol.compare",
+                              args.pairs / ( time.time() - start ) / 1e6 ) )
+
+    # Only the upper triangle is computed, and counted
+    cosines = args.symbols * ( args.symbols + 1 ) / 2
+    for megabytes in args.megabytes:
+        start = time.time()
+        for block in blocks( vocabulary, max_bytes = megabytes << 20 ):
+            pass
+        print( "%-16s %16.1f" % ( "gram %d MB" % megabytes,
+                                  cosines / ( time.time() - start ) / 1e6 ) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Run the benchmark suite, or compare the results of two runs.
+
+Each case times one operation of the library over a sweep of
+dimensionality, vocabulary size and batch size, and reports the operations
+per second, the percentiles of the latency of each call and the peak
+resident memory.  Results are saved as JSON so that runs may be compared:
+
+    python benchmarks/run.py run -o before.json
+    ... change the library ...
+    python benchmarks/run.py run -o after.json
+    python benchmarks/run.py compare before.json after.json --threshold 0.1
+
+The compare command exits with status 1 if the throughput of any case
+falls by more than the threshold (or, with `--p99`, its tail latency rises
+by more).  Use `--quick` for a small sweep, and `--cases` to select
+cases by name.
+"""
+from __future__ import print_function, division
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import time
+
+import numpy
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert( 0, os.path.join( os.path.dirname( __file__ ), ".." ) )
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.Memory import CleanUpMemory
+from Holographic.utils import vec_generate, vec_convolve_circular
+
+# The parameters swept, in the order cases take them
+_ORDER = [ "dimensionality", "vocabulary", "batch" ]
+
+FULL = { "dimensionality" : [ 64, 256, 1024, 4096, 16384 ],
+         "vocabulary" : [ 100, 10000, 1000000 ],
+         "batch" : [ 1, 32 ] }
+QUICK = { "dimensionality" : [ 64, 512 ],
+          "vocabulary" : [ 100, 10000 ],
+          "batch" : [ 1, 32 ] }
+
+def _factory( d ):
+    return SymbolFactory( d, vec_generate, Symbol, seed = 0 )
+
+def _pairs( d, batch ):
+    """Return batches of Symbols to operate on, with known spectra."""
+    factory = _factory( d )
+    a = factory.new_symbols( [ "a%d" % i for i in range( batch ) ] )
+    b = factory.new_symbols( [ "b%d" % i for i in range( batch ) ] )
+    ( a, b ) = ( list( a ), list( b ) )
+    for s in a + b:
+        s.spectrum()
+    return ( factory, a, b )
+
+# Each case takes its parameters and returns a function which performs the
+# operation, and the number of operations each call performs.
+
+def case_convolve( d ):
+    ( x, y ) = ( vec_generate( d ), vec_generate( d ) )
+    return ( lambda: vec_convolve_circular( x, y ), 1 )
+
+def case_bind( d, batch ):
+    ( factory, a, b ) = _pairs( d, batch )
+    if batch == 1:
+        return ( lambda: a[0].bind( b[0] ), 1 )
+    return ( lambda: factory.bind_many( a, b ), batch )
+
+def case_unbind( d, batch ):
+    ( factory, a, b ) = _pairs( d, batch )
+    if batch == 1:
+        return ( lambda: a[0].unbind( b[0] ), 1 )
+    return ( lambda: factory.unbind_many( a, b ), batch )
+
+# Without batched forms of compose and exponentiate, a batch is a loop over
+# its Symbols.
+
+def case_compose( d, batch ):
+    ( factory, a, b ) = _pairs( d, batch )
+    if batch == 1:
+        return ( lambda: a[0].compose( b[0] ), 1 )
+    return ( lambda: [ x.compose( y ) for ( x, y ) in zip( a, b ) ], batch )
+
+def case_exponentiate( d, batch ):
+    ( factory, a, b ) = _pairs( d, batch )
+    if batch == 1:
+        return ( lambda: a[0].exponentiate( 2.5 ), 1 )
+    return ( lambda: [ x.exponentiate( 2.5 ) for x in a ], batch )
+
+def case_inverse( d ):
+    ( factory, a, b ) = _pairs( d, 1 )
+    return ( lambda: a[0].inverse(), 1 )
+
+def _memory( d, n, batch ):
+    factory = _factory( d )
+    memory = CleanUpMemory( factory )
+    memory.add_vocabulary( factory.new_symbols( [ "s%d" % i
+                                                  for i in range( n ) ] ) )
+    noise = factory.new_symbols( [ "n%d" % i for i in range( batch ) ] )
+    queries = [ memory._symbol( i % n ).compose( noise.symbol( i ) )
+                for i in range( batch ) ]
+    return ( memory, queries )
+
+def case_clean_top1( d, vocabulary, batch ):
+    ( memory, queries ) = _memory( d, vocabulary, batch )
+    return ( lambda: memory.clean_batch( queries, 1 ), batch )
+
+def case_clean_topk( d, vocabulary, batch ):
+    ( memory, queries ) = _memory( d, vocabulary, batch )
+    return ( lambda: memory.clean_batch( queries, 10 ), batch )
+
+def case_generate( d, vocabulary ):
+    factory = _factory( d )
+    labels = [ "s%d" % i for i in range( vocabulary ) ]
+    return ( lambda: factory.new_symbols( labels ), vocabulary )
+
+# name -> ( case, parameters swept, bytes of vectors needed )
+CASES = [
+    ( "convolve", case_convolve, ( "dimensionality", ), None ),
+    ( "bind", case_bind, ( "dimensionality", "batch" ), None ),
+    ( "unbind", case_unbind, ( "dimensionality", "batch" ), None ),
+    ( "compose", case_compose, ( "dimensionality", "batch" ), None ),
+    ( "exponentiate", case_exponentiate, ( "dimensionality", "batch" ),
+      None ),
+    ( "inverse", case_inverse, ( "dimensionality", ), None ),
+    ( "clean_top1", case_clean_top1,
+      ( "dimensionality", "vocabulary", "batch" ), 8 ),
+    ( "clean_topk", case_clean_topk,
+      ( "dimensionality", "vocabulary", "batch" ), 8 ),
+    ( "generate", case_generate, ( "dimensionality", "vocabulary" ), 16 ),
+]
+
+def _sweep( names, values ):
+    """Yield every combination of the values of the named parameters."""
+    if not names:
+        yield {}
+        return
+    for rest in _sweep( names[1:], values ):
+        for v in values[names[0]]:
+            params = { names[0] : v }
+            params.update( rest )
+            yield params
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / ( 2.**20 if sys.platform == "darwin" else 2.**10 )
+
+def measure( case, params, seconds, minimum ):
+    """Time calls of a case for at least the given time and number of
+    calls, returning a dictionary of results."""
+    ( call, ops ) = case( *[ params[p] for p in sorted( params,
+                             key = _ORDER.index ) ] )
+    call()  # Warm up
+
+    latencies = []
+    start = time.perf_counter()
+    while len( latencies ) < minimum or \
+          time.perf_counter() - start < seconds:
+        t = time.perf_counter()
+        call()
+        latencies.append( time.perf_counter() - t )
+    total = time.perf_counter() - start
+
+    latencies = numpy.array( latencies ) * 1e6
+    ( p50, p90, p99 ) = numpy.percentile( latencies, [ 50, 90, 99 ] )
+    return { "calls" : len( latencies ),
+             "ops_per_sec" : ops * len( latencies ) / total,
+             "latency_us" : { "p50" : p50, "p90" : p90, "p99" : p99,
+                              "mean" : latencies.mean() },
+             "peak_rss_mb" : _peak_rss_mb() }
+
+def _isolated( queue, case, params, seconds, minimum ):
+    try:
+        queue.put( measure( case, params, seconds, minimum ) )
+    except Exception as e:
+        queue.put( { "error" : "%s: %s" % ( type( e ).__name__, e ) } )
+
+def _run_isolated( case, params, args ):
+    """Measure a case in a new process, so that the peak memory is that of
+    this case alone.  A process which dies, e.g. killed for want of memory,
+    or outlives the timeout fails the case."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target = _isolated,
+        args = ( results, case, params, args.time, args.calls ) )
+    process.start()
+
+    deadline = time.time() + args.timeout
+    result = None
+    while result is None:
+        try:
+            result = results.get( timeout = 1. )
+        except queue.Empty:
+            if time.time() > deadline:
+                process.terminate()
+                result = { "error" : "timed out after %g s" % args.timeout }
+            elif not process.is_alive():
+                # The result may have been sent just before exiting
+                try:
+                    result = results.get( timeout = 1. )
+                except queue.Empty:
+                    result = { "error" : "process died with exit code %s" %
+                                         process.exitcode }
+    process.join()
+    return result
+
+def run( args ):
+    sweep = QUICK if args.quick else FULL
+    for p in _ORDER:
+        if getattr( args, p ):
+            sweep = dict( sweep, **{ p : getattr( args, p ) } )
+
+    results = []
+    for ( name, case, names, itemsize ) in CASES:
+        if args.cases and name not in args.cases:
+            continue
+
+        for params in _sweep( list( names ), sweep ):
+            size = ( itemsize or 0 ) * params["dimensionality"] * \
+                   params.get( "vocabulary", 0 )
+            if size > args.max_bytes:
+                print( "%-14s %-44s skipped, needs %.1f GB" % (
+                       name, _describe( params ), size / 2.**30 ) )
+                continue
+
+            if args.isolate:
+                result = _run_isolated( case, params, args )
+            else:
+                result = measure( case, params, args.time, args.calls )
+
+            result.update( { "case" : name, "params" : params } )
+            results.append( result )
+            _report( result )
+
+    output = { "meta" : { "time" : time.strftime( "%Y-%m-%dT%H:%M:%S" ),
+                          "python" : platform.python_version(),
+                          "numpy" : numpy.__version__,
+                          "platform" : platform.platform(),
+                          "machine" : platform.machine() },
+               "results" : results }
+    if args.output:
+        with open( args.output, "w" ) as f:
+            json.dump( output, f, indent = 2, sort_keys = True )
+        print( "Saved %d results to %s" % ( len( results ), args.output ) )
+
+def _describe( params ):
+    return " ".join( "%s=%d" % ( p[0], params[p] )
+                     for p in _ORDER if p in params )
+
+def _report( result ):
+    if "error" in result:
+        print( "%-14s %-44s %s" % ( result["case"],
+               _describe( result["params"] ), result["error"] ) )
+        return
+
+    rss = result["peak_rss_mb"]
+    print( "%-14s %-32s %12.1f ops/s  p50 %9.1f us  p99 %9.1f us  %s" % (
+           result["case"], _describe( result["params"] ),
+           result["ops_per_sec"], result["latency_us"]["p50"],
+           result["latency_us"]["p99"],
+           "-" if rss is None else "%.0f MB" % rss ) )
+
+def _key( result ):
+    return ( result["case"], tuple( sorted( result["params"].items() ) ) )
+
+def compare( args ):
+    with open( args.baseline ) as f:
+        baseline = dict( ( _key( r ), r ) for r in json.load( f )["results"]
+                         if "error" not in r )
+    with open( args.candidate ) as f:
+        candidate = [ r for r in json.load( f )["results"] if "error" not in r ]
+
+    print( "%-14s %-32s %12s %12s %8s %8s" % ( "case", "parameters",
+           "base ops/s", "new ops/s", "change", "p99" ) )
+    regressions = 0
+    for r in candidate:
+        base = baseline.get( _key( r ) )
+        if base is None:
+            continue
+
+        speed = r["ops_per_sec"] / base["ops_per_sec"] - 1.
+        tail = r["latency_us"]["p99"] / base["latency_us"]["p99"] - 1.
+        flag = ""
+        if speed < -args.threshold or ( args.p99 and tail > args.threshold ):
+            flag = "REGRESSION"
+            regressions += 1
+        print( "%-14s %-32s %12.1f %12.1f %+7.1f%% %+7.1f%% %s" % (
+               r["case"], _describe( r["params"] ), base["ops_per_sec"],
+               r["ops_per_sec"], 100. * speed, 100. * tail, flag ) )
+
+    print( "%d regression(s) beyond %.0f%%" % ( regressions,
+                                                100. * args.threshold ) )
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser( description = __doc__.split( "\n" )[0] )
+    commands = parser.add_subparsers( dest = "command" )
+
+    p = commands.add_parser( "run", help = "run the suite" )
+    p.add_argument( "-o", "--output", help = "file to save the results to" )
+    p.add_argument( "--quick", action = "store_true",
+                    help = "sweep a few small sizes only" )
+    p.add_argument( "--cases", nargs = "+",
+                    choices = [ c[0] for c in CASES ] )
+    p.add_argument( "-d", "--dimensionality", type = int, nargs = "+" )
+    p.add_argument( "-n", "--vocabulary", type = int, nargs = "+" )
+    p.add_argument( "-b", "--batch", type = int, nargs = "+" )
+    p.add_argument( "-t", "--time", type = float, default = 0.5,
+                    help = "least time to spend timing each case (s)" )
+    p.add_argument( "--calls", type = int, default = 5,
+                    help = "least number of calls of each case" )
+    p.add_argument( "--max-bytes", type = float, default = 2.**31,
+                    help = "skip cases whose vectors need more memory" )
+    p.add_argument( "--no-isolate", dest = "isolate", action = "store_false",
+                    help = "run every case in this process" )
+    p.add_argument( "--timeout", type = float, default = 600.,
+                    help = "fail an isolated case which runs for longer (s)" )
+
+    p = commands.add_parser( "compare", help = "compare two runs" )
+    p.add_argument( "baseline" )
+    p.add_argument( "candidate" )
+    p.add_argument( "--threshold", type = float, default = 0.1,
+                    help = "fractional slow down counted as a regression" )
+    p.add_argument( "--p99", action = "store_true",
+                    help = "also count a rise in p99 latency beyond the " \
+                           "threshold as a regression" )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run( args )
+    elif args.command == "compare":
+        sys.exit( compare( args ) )
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
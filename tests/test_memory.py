@@ -0,0 +1,138 @@
+"""Tests of removing, replacing and finding symbols in a CleanUpMemory, and
+of compacting it."""
+import unittest
+
+import numpy
+
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.Memory import CleanUpMemory
+from Holographic.Index import HyperplaneIndex
+from Holographic.utils import vec_generate
+
+D = 128
+
+class TestRemoval( unittest.TestCase ):
+    def setUp( self ):
+        self.factory = SymbolFactory( D, vec_generate, Symbol, seed = 1 )
+        self.vocabulary = self.factory.new_symbols(
+            [ "s%d" % i for i in range( 40 ) ] )
+
+    def memory( self, **kwargs ):
+        memory = CleanUpMemory( self.factory, **kwargs )
+        memory.add_vocabulary( self.vocabulary )
+        return memory
+
+    def labels( self, memory, symbol, k = None ):
+        return [ s.label() for ( sim, s ) in memory.clean( symbol, k ) ]
+
+    def test_remove_by_symbol_and_label( self ):
+        memory = self.memory()
+        memory.remove_symbol( self.vocabulary.symbol( 3 ) )
+        memory.remove_symbol( "s4" )
+
+        self.assertEqual( len( memory ), 38 )
+        self.assertNotIn( "s3", memory )
+        self.assertNotIn( "s4", memory )
+        for i in ( 3, 4 ):
+            found = self.labels( memory, self.vocabulary.symbol( i ) )
+            self.assertNotIn( self.vocabulary.labels[i], found )
+        self.assertEqual( len( memory.vectors ), 38 )
+        with self.assertRaises( KeyError ):
+            memory.remove_symbol( "s3" )
+
+    def test_duplicate_labels( self ):
+        # Symbols of the algebra share structural labels
+        memory = self.memory()
+        ( a, b ) = ( self.vocabulary.symbol( 0 ), self.vocabulary.symbol( 1 ) )
+        ( first, second ) = ( a.bind( b ), a.bind( b ).compose( b ) )
+        second = self.factory.make_symbol( first.label(), second.vector() )
+        memory.add_symbol( first )
+        memory.add_symbol( second )
+
+        memory.remove_symbol( second )
+        self.assertIn( first.label(), memory )
+        self.assertIs( memory[first.label()], first )
+        self.assertIs( memory.cleanest( first ), first )
+        self.assertIsNot( memory.cleanest( second ), second )
+
+        memory.remove_symbol( first.label() )
+        self.assertNotIn( first.label(), memory )
+
+    def test_replace( self ):
+        memory = self.memory()
+        new = self.factory.new_symbol( "new" )
+        memory.replace_symbol( "s5", new )
+
+        self.assertEqual( len( memory ), 40 )
+        self.assertNotIn( "s5", memory )
+        self.assertIs( memory["new"], new )
+        self.assertIs( memory.cleanest( new ), new )
+
+    def test_unknown_symbol( self ):
+        memory = self.memory()
+        with self.assertRaises( KeyError ):
+            memory.remove_symbol( self.factory.make_symbol(
+                "s6", vec_generate( D ) ) )
+        self.assertIn( "s6", memory )
+
+    def test_snapshot_unchanged_by_removal( self ):
+        memory = self.memory()
+        before = memory._state
+        memory.remove_symbol( "s7" )
+        self.assertIsNone( before.alive() )
+        self.assertEqual( before.count - before.dead, 40 )
+        self.assertEqual( memory._state.dead, 1 )
+
+    def check_compaction( self, **kwargs ):
+        memory = self.memory( compact_threshold = 0.2, **kwargs )
+        queries = [ self.vocabulary.symbol( i ) for i in range( 40 ) ]
+        for i in range( 0, 20, 2 ):
+            memory.remove_symbol( "s%d" % i )
+        if memory._compactor is not None:
+            memory._compactor.join()
+
+        state = memory._state
+        self.assertLessEqual( state.dead, 0.2 * state.count )
+        self.assertEqual( len( memory ), 30 )
+        self.assertEqual( len( memory.symbols ), 30 )
+        for ( i, query ) in enumerate( queries ):
+            best = memory.cleanest( query )
+            if i < 20 and i % 2 == 0:
+                self.assertNotEqual( best.label(), "s%d" % i )
+            else:
+                self.assertEqual( best.label(), "s%d" % i )
+                self.assertIs( memory["s%d" % i], best )
+
+    def test_compaction( self ):
+        self.check_compaction()
+
+    def test_compaction_quantised( self ):
+        self.check_compaction( scan_dtype = numpy.int8 )
+
+    def test_compaction_indexed( self ):
+        self.check_compaction( index = HyperplaneIndex( n_bits = 4,
+                                                        seed = 0 ) )
+
+    def test_compaction_in_background( self ):
+        self.check_compaction( background = True )
+
+    def test_changes_during_compaction( self ):
+        memory = self.memory( compact_threshold = None )
+        for i in range( 10 ):
+            memory.remove_symbol( "s%d" % i )
+
+        # Changes made after the rows are copied are applied afterwards
+        old = memory._state
+        state = memory._copy_live( old )
+        memory.remove_symbol( "s20" )
+        memory.add_symbol( self.factory.new_symbol( "extra" ) )
+        memory._state = memory._catch_up( old, state, memory._state )
+        memory._labels = None
+
+        self.assertEqual( len( memory ), 30 )
+        self.assertNotIn( "s20", memory )
+        self.assertIn( "extra", memory )
+        self.assertEqual( memory.cleanest( memory["extra"] ).label(), "extra" )
+
+if __name__ == "__main__":
+    unittest.main()
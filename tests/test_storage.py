@@ -0,0 +1,61 @@
+"""Tests of saving vocabularies and memories to stores and loading them."""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from Holographic.Symbol import SymbolFactory, Symbol
+from Holographic.Memory import CleanUpMemory
+from Holographic.Storage import ( save_vocabulary, save_memory,
+                                  load_vocabulary, load_memory )
+from Holographic.utils import vec_generate
+
+D = 128
+
+class TestStorage( unittest.TestCase ):
+    def setUp( self ):
+        self.factory = SymbolFactory( D, vec_generate, Symbol, seed = 1 )
+        self.vocabulary = self.factory.new_symbols(
+            [ "s%d" % i for i in range( 20 ) ] )
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join( self.directory, "store" )
+
+    def tearDown( self ):
+        shutil.rmtree( self.directory )
+
+    def test_vocabulary( self ):
+        save_vocabulary( self.vocabulary, self.path )
+        loaded = load_vocabulary( self.path, self.factory )
+
+        self.assertEqual( loaded.labels, self.vocabulary.labels )
+        self.assertTrue( numpy.array_equal( loaded.vectors,
+                                            self.vocabulary.vectors ) )
+
+    def test_memory_with_duplicate_labels( self ):
+        # Symbols of the algebra share structural labels
+        memory = CleanUpMemory( self.factory )
+        memory.add_vocabulary( self.vocabulary )
+        ( a, b ) = ( self.vocabulary.symbol( 0 ), self.vocabulary.symbol( 1 ) )
+        first = a.bind( b )
+        second = self.factory.make_symbol( first.label(),
+                                           first.compose( b ).vector() )
+        memory.add_symbol( first )
+        memory.add_symbol( second )
+
+        save_memory( memory, self.path )
+        loaded = load_memory( self.path, self.factory )
+
+        self.assertEqual( len( loaded ), 22 )
+        self.assertTrue( numpy.array_equal( loaded.vectors, memory.vectors ) )
+        for query in ( self.vocabulary.symbol( 5 ), first, second ):
+            best = loaded.cleanest( query )
+            self.assertEqual( best.label(), u"%s" % query.label() )
+            self.assertTrue( numpy.allclose( best.vector(), query.vector() ) )
+
+        with self.assertRaises( ValueError ):
+            load_vocabulary( self.path, self.factory )
+
+if __name__ == "__main__":
+    unittest.main()